@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BookingConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking'
+
+    def ready(self):
+        # Register signal handlers at app startup (cache invalidation)
+        import booking.signals  # noqa: F401
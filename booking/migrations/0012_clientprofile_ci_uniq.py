@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:15
+
+import django.db.models.functions.text
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0011_booking_cancellation_time_alter_booking_status'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='clientprofile',
+            constraint=models.UniqueConstraint(django.db.models.functions.text.Lower('name'), django.db.models.functions.text.Lower('email'), models.F('phone'), name='clientprofile_ci_uniq', violation_error_message='A client with the same name, email, and phone already exists.'),
+        ),
+    ]
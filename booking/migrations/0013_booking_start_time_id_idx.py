@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0012_clientprofile_ci_uniq'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['start_time', 'id'], name='booking_start_time_id_idx'),
+        ),
+    ]
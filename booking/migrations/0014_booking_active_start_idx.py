@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0013_booking_start_time_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(condition=models.Q(('status', 'CANCELLED'), _negated=True), fields=['start_time'], name='booking_active_start_idx'),
+        ),
+    ]
@@ -5,7 +5,7 @@
 #
 # Design highlights:
 # - ClientProfile: Optional link to auth User (public can book without login).
-#   • clean() prevents duplicates by (name/email case-insensitive + phone exact).
+#   • A unique constraint prevents duplicates by (name/email case-insensitive + phone exact).
 # - Service: Validates price and duration; "active" flag controls visibility.
 # - Staff: Basic identity for stylists; unique email for admin clarity.
 # - Booking:
@@ -17,28 +17,46 @@
 #
 # Notes for developers:
 # - Duplicate ClientProfile prevention:
-#   We handle it in model.clean() so admin and any entry points respect it.
-#   The API's "create client" endpoint should also “find-or-create” before adding.
-# - If you want DB-level uniqueness later (PostgreSQL), add a migration with a
-#   UniqueConstraint on Lower(name), Lower(email), and phone. This is not included
-#   here to keep it portable (SQLite doesn’t support function-based unique nicely).
+#   A UniqueConstraint on Lower(name), Lower(email), and phone
+#   ("clientprofile_ci_uniq"). full_clean() validates it (so admin reports a
+#   duplicate as a normal form error), and the DB enforces it for every other
+#   entry point. Expression constraints work on both SQLite and PostgreSQL,
+#   and make concurrent find-or-create safe.
+#   The API's "create client" endpoint also “find-or-creates” before adding.
 #
 
 from django.db import models
+from django.db.models import Q, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
 from django.core.validators import MinValueValidator
 from django.contrib.auth.models import User
-from django.core.exceptions import ValidationError
 
 
 # -------------------------
 # Client (person who books)
 # -------------------------
+class ClientProfileQuerySet(models.QuerySet):
+    def matching(self, name, email):
+        """
+        Case-insensitive match on name and email.
+
+        Written as LOWER(col) = LOWER(value) rather than __iexact (UPPER(...) on
+        PostgreSQL, LIKE on SQLite) so the lookup can use the index behind the
+        clientprofile_ci_uniq constraint instead of scanning the table.
+        """
+        return self.filter(
+            Exact(Lower("name"), Lower(Value(name))),
+            Exact(Lower("email"), Lower(Value(email))),
+        )
+
+
 class ClientProfile(models.Model):
     """
     A client who books an appointment.
     - 'user' link is optional (public can book with just name/email/phone).
     - We prevent duplicates by using a case-insensitive match on name and email,
-      and exact match on phone in model.clean().
+      and exact match on phone (clientprofile_ci_uniq).
     """
     user = models.OneToOneField(
         User,
@@ -51,54 +69,21 @@ class ClientProfile(models.Model):
     email = models.EmailField()
     phone = models.CharField(max_length=20)
 
+    objects = ClientProfileQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
-    def clean(self):
-        """
-        Soft duplicate prevention (app-level):
-        - Disallow another profile with same (name/email case-insensitive) + phone exact.
-        - Allows saving when updating the same record (excludes self.pk).
-        - This runs in admin and forms/serializers that call full_clean().
-        """
-        # Normalize for comparison
-        name = (self.name or "").strip()
-        email = (self.email or "").strip()
-        phone = (self.phone or "").strip()
-
-        # If any key fields are missing, let the form/serializer handle "required".
-        if not name or not email or not phone:
-            return
-
-        qs = ClientProfile.objects.filter(
-            name__iexact=name,
-            email__iexact=email,
-            phone=phone,
-        )
-        if self.pk:
-            qs = qs.exclude(pk=self.pk)
-
-        if qs.exists():
-            raise ValidationError(
-                "A client with the same name, email, and phone already exists."
-            )
-
-    # If you later want DB-level uniqueness (recommended for Postgres):
-    # 1) Create a migration with UniqueConstraint using Lower(name), Lower(email), phone.
-    # 2) Keep this clean() for admin UX and helpful errors.
-    #
-    # Example (Postgres only, not included here):
-    # from django.db.models.functions import Lower
-    # class Migration(migrations.Migration):
-    #     operations = [
-    #         migrations.AddConstraint(
-    #             model_name="clientprofile",
-    #             constraint=models.UniqueConstraint(
-    #                 Lower("name"), Lower("email"), "phone",
-    #                 name="uniq_clientprofile_name_email_phone_ci",
-    #             ),
-    #         ),
-    #     ]
+    class Meta:
+        constraints = [
+            # Case-insensitive name/email + exact phone. Also checked by
+            # full_clean() (admin), with a readable message instead of the default.
+            models.UniqueConstraint(
+                Lower("name"), Lower("email"), "phone",
+                name="clientprofile_ci_uniq",
+                violation_error_message="A client with the same name, email, and phone already exists.",
+            ),
+        ]
 
 
 # -------------------------
@@ -178,6 +163,21 @@ class Booking(models.Model):
         help_text="When the booking was cancelled (if applicable).",
     )
 
+    class Meta:
+        indexes = [
+            # Serves start_time range filters and the booking list's
+            # (-start_time, -id) cursor ordering (scanned backwards).
+            models.Index(fields=["start_time", "id"], name="booking_start_time_id_idx"),
+            # Partial index for reads that skip cancelled bookings (staff calendar,
+            # availability): smaller than a (status, start_time) composite and
+            # serves the start_time range directly.
+            models.Index(
+                fields=["start_time"],
+                condition=~Q(status="CANCELLED"),
+                name="booking_active_start_idx",
+            ),
+        ]
+
     def __str__(self):
         return f"{self.client.name} → {self.service.name} on {self.start_time}"
 
@@ -23,7 +23,8 @@ class StaffSerializer(serializers.ModelSerializer):
 class BookingSerializer(serializers.ModelSerializer):
     # Explicitly accept PKs (optional; DRF can infer)
     client = serializers.PrimaryKeyRelatedField(queryset=ClientProfile.objects.all())
-    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.all())
+    # description is never read while creating/validating a booking; don't load it
+    service = serializers.PrimaryKeyRelatedField(queryset=Service.objects.defer("description"))
     staff = serializers.PrimaryKeyRelatedField(queryset=Staff.objects.all(), allow_null=True, required=False)
 
     class Meta:
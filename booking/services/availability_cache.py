@@ -0,0 +1,111 @@
+"""
+availability_cache.py
+---------------------
+Short-lived cache for computed availability slots (SRS 7.0).
+
+Keys:
+- availability:{service_id}:{YYYY-MM-DD}:{day_ver}:{global_ver} -> (slots, epochs, etag)
+  for that day: the engine's slot dicts, each slot's start as Unix seconds, and
+  a hash of the slot list (the view's ETag, computed once per entry).
+  The list is stored unfiltered; the view drops past slots after reading, so a
+  single entry serves every request for that service/day.
+- availability:ver:{YYYY-MM-DD} -> day version, bumped when a booking on that
+  day is saved or deleted.
+- availability:ver:global -> bumped when staff, staff availability windows or
+  services change (these affect every day).
+
+Invalidation:
+- Bumping a version changes the key, so old entries are never read again and
+  age out after AVAILABILITY_TTL. No key scans or per-service deletes.
+- A missing version key (never set, evicted, or a fresh LocMemCache after a
+  restart) is seeded from the clock on read, so it never falls back to a value
+  that live entries may have been stored under.
+- A booking ties up its staff member for every service, so the day version is
+  shared by ALL services.
+- Bumps are wired to model signals in booking/signals.py, so API, admin and
+  shell edits all invalidate. A rescheduled booking bumps its old day(s) too.
+
+Notes:
+- Uses Django's cache framework, so it works with Redis (REDIS_URL set) or the
+  in-process LocMemCache used in dev/tests (see settings.CACHES).
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+AVAILABILITY_TTL = 60  # seconds
+GLOBAL_VERSION_KEY = "availability:ver:global"
+
+
+def day_version_key(date_str: str) -> str:
+    return f"availability:ver:{date_str}"
+
+
+def availability_key(service_id, date_str: str) -> str:
+    """
+    Current cache key for a service/day (reads both version tags in one round trip;
+    seeds any that are missing).
+    """
+    day_key = day_version_key(date_str)
+    versions = cache.get_many([day_key, GLOBAL_VERSION_KEY])
+    day_ver = versions.get(day_key)
+    if day_ver is None:
+        day_ver = _seed(day_key)
+    global_ver = versions.get(GLOBAL_VERSION_KEY)
+    if global_ver is None:
+        global_ver = _seed(GLOBAL_VERSION_KEY)
+    return f"availability:{service_id}:{date_str}:{day_ver}:{global_ver}"
+
+
+def get_cached_slots(key: str):
+    """
+    Return the cached (slots, epochs, etag) triple, or None on a miss.
+    """
+    return cache.get(key)
+
+
+def set_cached_slots(key: str, slots, epochs, etag: str) -> None:
+    cache.set(key, (slots, epochs, etag), timeout=AVAILABILITY_TTL)
+
+
+def _seed(version_key: str) -> int:
+    # Seed with the clock so a version key that was evicted never restarts at a
+    # value that still-live entries were stored under. If another request seeded
+    # it first, use that value.
+    cache.add(version_key, int(time.time()), timeout=None)
+    return cache.get(version_key, 0)
+
+
+def _bump(version_key: str) -> None:
+    _seed(version_key)
+    try:
+        cache.incr(version_key)
+    except ValueError:
+        pass  # evicted between add() and incr(); the next add() reseeds it
+
+
+def invalidate_availability(booking) -> None:
+    """
+    Invalidate every service's availability on the day(s) the booking covers.
+    """
+    invalidate_availability_span(booking.start_time, booking.service.duration_minutes)
+
+
+def invalidate_availability_span(start, duration_minutes: int) -> None:
+    """
+    Invalidate every service's availability on the day(s) [start, start + duration)
+    touches (e.g. the slot a rescheduled booking used to hold).
+    """
+    end = start + timedelta(minutes=duration_minutes)
+    for day in {timezone.localdate(start), timezone.localdate(end)}:
+        _bump(day_version_key(day.isoformat()))
+
+
+def invalidate_all_availability() -> None:
+    """
+    Invalidate availability for every service and day (staff/service changes).
+    """
+    _bump(GLOBAL_VERSION_KEY)
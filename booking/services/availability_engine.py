@@ -13,11 +13,20 @@ Change log (2025-12-03):
 - _has_booking_conflict now uses symmetric overlap detection:
   existing_start < new_end AND existing_end > new_start
   to avoid missed overlaps or false negatives.
+- Cancelled bookings no longer block a slot.
+- first_free_staff() checks all staff for one slot with a fixed number of
+  queries (instead of one or more queries per staff member).
+- find_available_slots() loads the day's bookings and availability windows
+  once and checks slot x staff pairs in memory (was 1-3 queries per pair).
+- available_slot_rows() returns plain (start, staff_ids) tuples; callers build
+  whatever response shape they need from them.
 """
 
+from collections import defaultdict
 from datetime import timedelta
-from django.db.models import Q
-from ..models import Booking, Staff  # IMPORTANT: booking.models.Staff
+from django.db.models import Max, Q
+from ..models import Booking, Service, Staff  # IMPORTANT: booking.models.Staff
+from .slot_utils import generate_slots_for_day
 
 # Optional import: staff availability windows
 try:
@@ -46,7 +55,8 @@ class AvailabilityEngine:
         new_end = start_time + timedelta(minutes=duration_minutes)
 
         # Compute overlaps in Python (portable and clear)
-        for b in Booking.objects.filter(staff=staff).select_related("service"):
+        qs = Booking.objects.filter(staff=staff).exclude(status="CANCELLED").select_related("service")
+        for b in qs:
             existing_start = b.start_time
             existing_end = b.start_time + timedelta(minutes=b.service.duration_minutes)
             if existing_start < new_end and existing_end > new_start:
@@ -80,8 +90,101 @@ class AvailabilityEngine:
             return False
         return True
 
-    def find_available_slots(self, service, date_start, staff_queryset):
-        from .slot_utils import generate_slots_for_day
+    def _booked_intervals(self, start_time, end_time) -> dict:
+        """
+        staff_id -> [(start, end), ...] for (non-cancelled) bookings overlapping
+        [start_time, end_time).
+
+        One query: Booking has no end column, so we only look back as far as the
+        longest service could reach, then apply the same overlap rule as
+        _has_booking_conflict in Python.
+        """
+        longest = Service.objects.aggregate(m=Max("duration_minutes"))["m"] or 0
+        rows = (
+            Booking.objects
+            .filter(
+                staff__isnull=False,
+                start_time__lt=end_time,
+                start_time__gt=start_time - timedelta(minutes=longest),
+            )
+            .exclude(status="CANCELLED")
+            .values_list("staff_id", "start_time", "service__duration_minutes")
+        )
+        intervals = defaultdict(list)
+        for staff_id, existing_start, minutes in rows:
+            existing_end = existing_start + timedelta(minutes=minutes)
+            if existing_end > start_time:
+                intervals[staff_id].append((existing_start, existing_end))
+        return intervals
+
+    def _busy_staff_ids(self, start_time, end_time) -> set:
+        """
+        IDs of staff with a (non-cancelled) booking overlapping [start_time, end_time).
+        """
+        return set(self._booked_intervals(start_time, end_time))
+
+    def _constrained_staff_ids(self) -> set:
+        """
+        IDs of staff that have any availability rows at all (the rest are
+        available by default). Caller checks HAS_STAFF_AVAILABILITY.
+        """
+        return set(StaffAvailability.objects.values_list("staff_id", flat=True).distinct())
+
+    def _staff_windows(self, start_time, end_time):
+        """
+        Availability windows for [start_time, end_time) in two queries:
+        - windows: staff_id -> [(start, end), ...] for rows overlapping the range
+        - constrained: IDs of staff that have any availability rows at all
+        """
+        if not HAS_STAFF_AVAILABILITY:
+            return {}, set()
+        constrained = self._constrained_staff_ids()
+        windows = defaultdict(list)
+        rows = StaffAvailability.objects.filter(
+            start_time__lt=end_time,
+            end_time__gt=start_time,
+        ).values_list("staff_id", "start_time", "end_time")
+        for staff_id, w_start, w_end in rows:
+            windows[staff_id].append((w_start, w_end))
+        return windows, constrained
+
+    def _staff_outside_availability(self, start_time, end_time) -> set:
+        """
+        IDs of staff whose availability windows do NOT cover [start_time, end_time).
+        Staff with no availability rows at all are allowed (same as _fits_staff_availability).
+        """
+        if not HAS_STAFF_AVAILABILITY:
+            return set()
+        constrained = self._constrained_staff_ids()
+        covering = set(
+            StaffAvailability.objects.filter(
+                start_time__lte=start_time,
+                end_time__gte=end_time,
+            ).values_list("staff_id", flat=True)
+        )
+        return constrained - covering
+
+    def first_free_staff(self, service, start_time, staff_queryset):
+        """
+        Return the first staff in staff_queryset free for this service at start_time,
+        or None. Same rules as is_slot_available_for_staff, but with a fixed number
+        of queries regardless of how many staff there are.
+        """
+        end_time = start_time + timedelta(minutes=service.duration_minutes)
+        unavailable = self._busy_staff_ids(start_time, end_time)
+        unavailable |= self._staff_outside_availability(start_time, end_time)
+        # Only the first match is needed: LIMIT 1 instead of fetching every free staff row
+        return staff_queryset.exclude(id__in=unavailable).first()
+
+    def available_slot_rows(self, service, date_start, staff_queryset, min_start=None):
+        """
+        Return [(start, [staff_id, ...]), ...] for the day starting at date_start:
+        each bookable slot start (aware datetime) with the IDs of staff free for it.
+
+        staff_queryset may be any iterable of Staff (e.g. a cached list).
+        min_start (aware datetime, optional): skip candidate slots that start at or
+        before this time, so past slots on "today" never reach the per-staff checks.
+        """
 
         # DEBUG — uncomment to inspect the staff list
         # print("DEBUG staff values:", [
@@ -94,15 +197,39 @@ class AvailabilityEngine:
             date_start=date_start,
         )
 
-        results = []
+        if min_start is not None:
+            slots = [start for start in slots if start > min_start]
+        if not slots:
+            return []
+
+        # Load the day's bookings and availability windows once, then check every
+        # slot x staff pair in memory (same rules as is_slot_available_for_staff).
+        duration = timedelta(minutes=service.duration_minutes)
+        day_start, day_end = slots[0], slots[-1] + duration
+        staff_ids = [staff.id for staff in staff_queryset if self._is_valid_staff(staff)]
+        booked = self._booked_intervals(day_start, day_end)
+        windows, constrained = self._staff_windows(day_start, day_end)
+
+        def is_free(staff_id, start, end):
+            for b_start, b_end in booked.get(staff_id, ()):
+                if b_start < end and b_end > start:
+                    return False
+            if staff_id not in constrained:
+                return True  # no availability rows at all: allowed by default
+            return any(w_start <= start and w_end >= end for w_start, w_end in windows.get(staff_id, ()))
+
+        rows = []
         for start in slots:
-            free_staff_ids = []
-            for staff in staff_queryset:
-                if not self._is_valid_staff(staff):
-                    continue  # skip bad values
-                if self.is_slot_available_for_staff(staff, service, start):
-                    free_staff_ids.append(staff.id)
+            end = start + duration
+            free_staff_ids = [staff_id for staff_id in staff_ids if is_free(staff_id, start, end)]
             if free_staff_ids:
-                results.append({"start_time": start.isoformat(), "staff_ids": free_staff_ids})
+                rows.append((start, free_staff_ids))
+        return rows
 
-        return {"slots": results}
\ No newline at end of file
+    def find_available_slots(self, service, date_start, staff_queryset, min_start=None):
+        """
+        Return {"slots": [{"start_time": iso, "staff_ids": [...]}, ...]}.
+        Same arguments as available_slot_rows.
+        """
+        rows = self.available_slot_rows(service, date_start, staff_queryset, min_start=min_start)
+        return {"slots": [{"start_time": start.isoformat(), "staff_ids": ids} for start, ids in rows]}
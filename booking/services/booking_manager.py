@@ -16,10 +16,16 @@ Notes:
 
 from datetime import timedelta
 from django.db import transaction
+from django.db.models import F, TextField, Value
+from django.db.models.functions import Coalesce, Concat
 from django.utils import timezone
 
+from notifications.tasks import send_booking_cancellation
+
 from ..models import Booking
+from .availability_cache import invalidate_availability
 from .availability_engine import AvailabilityEngine
+from .calendar_cache import invalidate_calendar
 
 
 class BookingManager:
@@ -27,7 +33,7 @@ class BookingManager:
         self.availability = AvailabilityEngine()
 
     @transaction.atomic
-    def create_booking(self, client, service, staff, start_time, notes=""):
+    def create_booking(self, client, service, staff, start_time, notes="", status="CONFIRMED"):
         """
         Create a booking after checking for overlap.
 
@@ -37,6 +43,7 @@ class BookingManager:
             staff: Staff instance (can be None if TBA)
             start_time: aware datetime
             notes: optional string
+            status: initial status; set on INSERT so post_save sees it with created=True
 
         Raises:
             ValueError: if slot overlaps with an existing booking for that staff.
@@ -57,25 +64,61 @@ class BookingManager:
             staff=staff,
             start_time=start_time,
             notes=notes,
+            status=status,
         )
         return booking
 
     @transaction.atomic
-    def cancel_booking(self, booking, cutoff_minutes: int = 120) -> bool:
+    def cancel_booking(self, booking, cutoff_minutes: int = 120, reason: str = "") -> bool:
         """
         Cancel a booking if outside the cutoff window.
-        If Booking.status exists, set to CANCELLED; otherwise delete.
+
+        The status flip is a single conditional UPDATE that re-checks both rules
+        (not cancelled, start_time past the cutoff) in SQL, so two concurrent
+        cancels can't both succeed (and both send emails), and a reschedule racing
+        the cancel can't slip it inside the cutoff.
+
+        Args:
+            booking: Booking instance (client/service ideally select_related)
+            cutoff_minutes: minimum lead time before start_time
+            reason: optional text appended to notes
+
+        Raises:
+            ValueError: inside the cutoff window, or already cancelled.
         """
         now = timezone.now()
-        if booking.start_time - now <= timedelta(minutes=cutoff_minutes):
+        cutoff = now + timedelta(minutes=cutoff_minutes)
+        # Checked here first only to give the clearer message; the UPDATE enforces it.
+        if booking.start_time <= cutoff:
             raise ValueError("Cannot cancel within 2 hours of appointment start.")
 
-        # If the model has a 'status' field, use it.
-        if hasattr(booking, "status"):
-            booking.status = "CANCELLED"
-            booking.save(update_fields=["status"])
-            return True
+        fields = {"status": "CANCELLED", "cancellation_time": now}
+        if reason:
+            # Appended in SQL, so a note saved elsewhere since booking was loaded survives
+            fields["notes"] = Concat(
+                Coalesce(F("notes"), Value("")),
+                Value(f"\n[Cancel reason] {reason}"),
+                output_field=TextField(),
+            )
+
+        claimed = (
+            Booking.objects.filter(pk=booking.pk, start_time__gt=cutoff)
+            .exclude(status="CANCELLED")
+            .update(**fields)
+        )
+        if not claimed:
+            raise ValueError("This booking is already cancelled or can no longer be cancelled.")
+
+        booking.status = "CANCELLED"
+        booking.cancellation_time = now
+        if reason:
+            booking.refresh_from_db(fields=["notes"])
 
-        # Fallback: delete if status doesn't exist (older version)
-        booking.delete()
-        return True
\ No newline at end of file
+        # .update() skips model signals, so do what booking/signals.py and
+        # notifications/signals.py would do for a cancellation: free the slot,
+        # drop the calendar month, and queue the emails once this commits.
+        invalidate_availability(booking)
+        invalidate_calendar(booking)
+        booking_id = booking.pk
+        transaction.on_commit(lambda: send_booking_cancellation.delay(booking_id))
+        return True
@@ -0,0 +1,49 @@
+"""
+calendar_cache.py
+-----------------
+Cache for the rendered staff month calendar (/admin/bookings-calendar/).
+
+Keys:
+- calendar:{YYYY}:{MM} -> rendered HTML (bytes) for that month
+
+Invalidation:
+- booking/signals.py drops the month of a booking whenever it is saved or
+  deleted (and the month it moved out of, when rescheduled). CALENDAR_TTL bounds staleness for changes that don't go through a
+  Booking signal (e.g. a client or staff rename).
+"""
+
+from django.core.cache import cache
+from django.utils import timezone
+
+CALENDAR_TTL = 300  # seconds
+
+
+def calendar_key(year: int, month: int) -> str:
+    return f"calendar:{year}:{month:02d}"
+
+
+def get_cached_calendar(year: int, month: int):
+    """
+    Return the cached HTML for this month, or None on a miss.
+    """
+    return cache.get(calendar_key(year, month))
+
+
+def set_cached_calendar(year: int, month: int, html: bytes) -> None:
+    cache.set(calendar_key(year, month), html, timeout=CALENDAR_TTL)
+
+
+def invalidate_calendar(booking) -> None:
+    """
+    Drop the cached month the booking falls in (local time).
+    """
+    invalidate_calendar_month(booking.start_time)
+
+
+def invalidate_calendar_month(start_time) -> None:
+    """
+    Drop the cached month containing start_time (local time), e.g. the month a
+    rescheduled booking moved out of.
+    """
+    local_day = timezone.localdate(start_time)
+    cache.delete(calendar_key(local_day.year, local_day.month))
@@ -0,0 +1,70 @@
+"""
+lookup_cache.py
+---------------
+Cached lookups for rows that change rarely but are read on hot endpoints.
+
+Keys:
+- service:{id}:profile -> Service instance (availability endpoint; booking
+  create peeks at it to reject inactive services before validation)
+- staff:all -> list of Staff ordered by id (availability endpoint)
+
+Invalidation:
+- booking/signals.py drops the entries on Service/Staff save/delete (API,
+  admin, shell), so edits show up immediately; the TTLs are only a safety net.
+"""
+
+from django.core.cache import cache
+
+from ..models import Service, Staff
+
+SERVICE_TTL = 300  # seconds
+STAFF_TTL = 600  # seconds
+STAFF_LIST_KEY = "staff:all"
+
+
+def service_key(service_id) -> str:
+    return f"service:{service_id}:profile"
+
+
+def get_service(service_id):
+    """
+    Return the Service with this id (from cache when possible), or None if it doesn't exist.
+    Misses for unknown ids are not cached.
+    """
+    key = service_key(service_id)
+    service = cache.get(key)
+    if service is None:
+        service = Service.objects.filter(pk=service_id).first()
+        if service is not None:
+            remember_service(service)
+    return service
+
+
+def peek_service(service_id):
+    """
+    Return the cached Service, or None on a miss. Never queries the DB.
+    """
+    return cache.get(service_key(service_id))
+
+
+def remember_service(service) -> None:
+    cache.set(service_key(service.pk), service, timeout=SERVICE_TTL)
+
+
+def invalidate_service(service_id) -> None:
+    cache.delete(service_key(service_id))
+
+
+def get_staff_list():
+    """
+    Return all Staff ordered by id (from cache when possible).
+    """
+    staff_list = cache.get(STAFF_LIST_KEY)
+    if staff_list is None:
+        staff_list = list(Staff.objects.order_by("id"))
+        cache.set(STAFF_LIST_KEY, staff_list, timeout=STAFF_TTL)
+    return staff_list
+
+
+def invalidate_staff_list() -> None:
+    cache.delete(STAFF_LIST_KEY)
@@ -0,0 +1,96 @@
+# booking/signals.py
+#
+# Purpose:
+# - Keep cached lookups in sync with the DB:
+#   * lookup_cache: cached Service rows and the staff list
+#   * availability_cache: computed availability slots (version bumps)
+#   * calendar_cache: rendered staff month calendar
+#
+# Notes:
+# - Registered in BookingConfig.ready().
+# - remember_stored_booking (pre_save) snapshots a booking's stored status,
+#   start_time and service duration in one query. It is the only pre_save
+#   receiver for Booking: booking_changed uses it to invalidate the day and
+#   calendar month a rescheduled booking left, and
+#   notifications.signals.booking_status_emails uses it to spot status changes.
+# - Receivers fire for API, admin and shell changes alike, so views don't need
+#   to invalidate by hand.
+#
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from .models import Booking, Service, Staff
+from .services.lookup_cache import invalidate_service, invalidate_staff_list
+from .services.availability_cache import (
+    invalidate_all_availability,
+    invalidate_availability,
+    invalidate_availability_span,
+)
+from .services.calendar_cache import invalidate_calendar, invalidate_calendar_month
+
+
+@receiver([post_save, post_delete], sender=Service)
+def service_changed(sender, instance: Service, **kwargs):
+    """
+    Drop the cached Service so price/duration/active edits apply right away.
+    Duration changes also change the slot grid, so availability is invalidated too.
+    """
+    invalidate_service(instance.pk)
+    invalidate_all_availability()
+
+
+# Columns the pre_save snapshot covers (service -> its duration)
+SNAPSHOT_FIELDS = {"status", "start_time", "service"}
+
+
+@receiver(pre_save, sender=Booking)
+def remember_stored_booking(sender, instance: Booking, update_fields=None, **kwargs):
+    """
+    Snapshot the stored row before an update as instance._stored:
+    {"status", "start_time", "service__duration_minutes"} (one query).
+
+    None on INSERT, or when update_fields shows none of SNAPSHOT_FIELDS is being
+    written (nothing the readers care about can change, so no query).
+    """
+    if instance._state.adding or instance.pk is None:
+        instance._stored = None
+    elif update_fields is not None and not SNAPSHOT_FIELDS & set(update_fields):
+        instance._stored = None
+    else:
+        instance._stored = (
+            Booking.objects.filter(pk=instance.pk)
+            .values("status", "start_time", "service__duration_minutes")
+            .first()
+        )
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def booking_changed(sender, instance: Booking, **kwargs):
+    """
+    A booking was created, cancelled, edited or deleted: its day's slots and
+    its month on the staff calendar changed. If it was moved (start_time or
+    service edited), the day and month it left changed as well.
+    """
+    invalidate_availability(instance)
+    invalidate_calendar(instance)
+    stored = getattr(instance, "_stored", None)
+    if stored is not None:
+        invalidate_availability_span(stored["start_time"], stored["service__duration_minutes"])
+        invalidate_calendar_month(stored["start_time"])
+
+
+@receiver([post_save, post_delete], sender=Staff)
+def staff_changed(sender, instance: Staff, **kwargs):
+    """
+    Drop the cached staff list and every day's slots.
+    """
+    invalidate_staff_list()
+    invalidate_all_availability()
+
+
+@receiver([post_save, post_delete], sender="staff.StaffAvailability")
+def roster_changed(sender, instance, **kwargs):
+    """
+    Availability windows changed: every day's slots may differ.
+    """
+    invalidate_all_availability()
@@ -1,7 +1,14 @@
+import json
 from decimal import Decimal
-from datetime import timedelta
+from datetime import datetime, time, timedelta
+from unittest import mock
 
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from django.contrib.auth.models import User
 from rest_framework.test import APIClient
@@ -13,6 +20,11 @@ from booking.models import (
     Booking,
     PriceHistory,
 )
+from booking.services.lookup_cache import get_service
+from booking.services.booking_manager import BookingManager
+from booking.views import ClientProfileCursorPagination
+from notifications.models import Notification
+from staff.models import StaffAvailability
 
 
 class PriceHistoryTests(TestCase):
@@ -179,4 +191,458 @@ class BookingRulesTests(TestCase):
 
         # Try to cancel (should fail with 400 because within 2 hours)
         r2 = self.api.post(f"/api/bookings/{booking_id}/cancel/")
-        self.assertEqual(r2.status_code, 400, f"Cancel should fail inside cutoff: {r2.status_code} body={r2.content}")
\ No newline at end of file
+        self.assertEqual(r2.status_code, 400, f"Cancel should fail inside cutoff: {r2.status_code} body={r2.content}")
+
+    def test_second_cancel_is_rejected(self):
+        payload = {
+            "client": self.client_profile.id,
+            "service": self.service.id,
+            "staff": self.staff.id,
+            "start_time": self._create_future_iso(hours=24),
+            "notes": "",
+        }
+        r1 = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r1.status_code, 201, f"Create failed: {r1.status_code} body={r1.content}")
+        booking_id = r1.json().get("id")
+
+        # Cancellation notices are queued on commit (notifications.signals)
+        with self.captureOnCommitCallbacks(execute=True):
+            r2 = self.api.post(f"/api/bookings/{booking_id}/cancel/")
+        self.assertEqual(r2.status_code, 200, f"Cancel failed: {r2.status_code} body={r2.content}")
+        booking = Booking.objects.get(pk=booking_id)
+        self.assertEqual(booking.status, "CANCELLED")
+        self.assertIsNotNone(booking.cancellation_time)
+        # One notice for the client (plus the owner alert), not one per code path
+        self.assertEqual(
+            [m.subject for m in mail.outbox if self.client_profile.email in m.to],
+            [f"Booking #{booking_id} Cancelled"],
+        )
+
+        # Only the first cancel flips the row (and sends the cancellation notice)
+        with self.captureOnCommitCallbacks(execute=True):
+            r3 = self.api.post(f"/api/bookings/{booking_id}/cancel/")
+        self.assertEqual(r3.status_code, 400, f"Second cancel should fail: {r3.status_code} body={r3.content}")
+        self.assertEqual(
+            Notification.objects.filter(user=self.client_profile, kind="CANCELLED").count(), 1
+        )
+
+
+class AvailabilityCacheTests(TestCase):
+    def setUp(self):
+        # Cached slots outlive a test's DB rollback, so start clean
+        cache.clear()
+
+        self.api = APIClient()
+        self.service = Service.objects.create(
+            name="Cut",
+            description="",
+            duration_minutes=60,
+            price=Decimal("50.00"),
+            active=True,
+        )
+        self.staff = Staff.objects.create(
+            name="Stylist A",
+            email="stylista@example.com",
+            role="Stylist",
+        )
+        self.client_profile = ClientProfile.objects.create(
+            name="Client One",
+            email="client1@example.com",
+            phone="5551234",
+        )
+
+        # Tomorrow at 10:00 local time (inside default 09:00–17:00 hours)
+        tomorrow = timezone.localdate() + timedelta(days=1)
+        self.date_str = tomorrow.isoformat()
+        self.slot_start = timezone.make_aware(datetime.combine(tomorrow, time(10, 0)))
+
+    def _slot_times(self):
+        r = self.api.get(f"/api/bookings/availability/?service={self.service.id}&date={self.date_str}")
+        self.assertEqual(r.status_code, 200, f"Unexpected: {r.status_code} body={r.content}")
+        return {s["start_time"] for s in r.json()["slots"]}
+
+    def test_booking_invalidates_cached_availability(self):
+        self.assertIn(self.slot_start.isoformat(), self._slot_times())
+
+        payload = {
+            "client": self.client_profile.id,
+            "service": self.service.id,
+            "staff": self.staff.id,
+            "start_time": self.slot_start.isoformat(),
+            "notes": "",
+        }
+        r = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r.status_code, 201, f"Create failed: {r.status_code} body={r.content}")
+
+        # The only staff member is now busy at 10:00, so the slot must disappear
+        self.assertNotIn(self.slot_start.isoformat(), self._slot_times())
+
+        # Cancelling frees it again
+        r = self.api.post(f"/api/bookings/{r.json()['id']}/cancel/")
+        self.assertEqual(r.status_code, 200, f"Cancel failed: {r.status_code} body={r.content}")
+        self.assertIn(self.slot_start.isoformat(), self._slot_times())
+
+    def test_rescheduled_booking_frees_its_old_day(self):
+        booking = Booking.objects.create(
+            client=self.client_profile, service=self.service, staff=self.staff, start_time=self.slot_start
+        )
+        self.assertNotIn(self.slot_start.isoformat(), self._slot_times())
+
+        # Admin/shell edit moves it to the next day: the old day's cached slots must refresh
+        booking.start_time = self.slot_start + timedelta(days=1)
+        booking.save()
+        self.assertIn(self.slot_start.isoformat(), self._slot_times())
+
+    def test_update_snapshots_stored_row_once(self):
+        booking = Booking.objects.create(
+            client=self.client_profile, service=self.service, staff=self.staff, start_time=self.slot_start
+        )
+        booking.notes = "Window seat"
+        # One pre_save SELECT shared by the cache and email receivers, then the UPDATE
+        with self.assertNumQueries(2):
+            booking.save()
+
+    def test_busy_staff_falls_back_to_free_staff(self):
+        other = Staff.objects.create(name="Stylist B", email="stylistb@example.com", role="Stylist")
+        payload = {
+            "client": self.client_profile.id,
+            "service": self.service.id,
+            "staff": self.staff.id,
+            "start_time": self.slot_start.isoformat(),
+            "notes": "",
+        }
+        r1 = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r1.status_code, 201, f"Create failed: {r1.status_code} body={r1.content}")
+        self.assertEqual(r1.json()["staff"], self.staff.id)
+
+        # Same staff/time again: the server re-assigns the next free staff member
+        r2 = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r2.status_code, 201, f"Create failed: {r2.status_code} body={r2.content}")
+        self.assertEqual(r2.json()["staff"], other.id)
+
+    def test_service_edit_refreshes_cached_service(self):
+        self.assertEqual(get_service(self.service.id).duration_minutes, 60)
+        self.service.duration_minutes = 90
+        self.service.save()
+        self.assertEqual(get_service(self.service.id).duration_minutes, 90)
+
+    def test_inactive_service_rejected_from_cache(self):
+        self.service.active = False
+        self.service.save()
+        payload = {
+            "client": self.client_profile.id,
+            "service": self.service.id,
+            "start_time": self.slot_start.isoformat(),
+        }
+        r1 = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r1.status_code, 400)
+
+        # Second attempt is answered from the cached Service without any queries
+        with self.assertNumQueries(0):
+            r2 = self.api.post("/api/bookings/", payload, format="json")
+        self.assertEqual(r2.status_code, 400)
+        self.assertFalse(Booking.objects.exists())
+
+    def test_availability_query_count_does_not_grow_with_staff(self):
+        def count_queries():
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                self._slot_times()
+            return len(ctx.captured_queries)
+
+        baseline = count_queries()
+        for i in range(4):
+            Staff.objects.create(name=f"Extra {i}", email=f"extra{i}@example.com", role="Stylist")
+        self.assertEqual(count_queries(), baseline)
+
+    def test_admin_style_edits_invalidate_availability(self):
+        # Changes made outside the API views (admin, shell) go through model signals
+        self.assertIn(self.slot_start.isoformat(), self._slot_times())
+        booking = Booking.objects.create(
+            client=self.client_profile, service=self.service, staff=self.staff, start_time=self.slot_start
+        )
+        self.assertNotIn(self.slot_start.isoformat(), self._slot_times())
+
+        booking.status = "CANCELLED"
+        booking.save()
+        self.assertIn(self.slot_start.isoformat(), self._slot_times())
+
+        self.staff.delete()
+        self.assertEqual(self._slot_times(), set())
+
+    def test_new_staff_shows_up_in_cached_availability(self):
+        self._slot_times()  # warms the cached staff list
+        other = Staff.objects.create(name="Stylist B", email="stylistb@example.com", role="Stylist")
+        r = self.api.get(f"/api/bookings/availability/?service={self.service.id}&date={self.date_str}")
+        slot = next(s for s in r.json()["slots"] if s["start_time"] == self.slot_start.isoformat())
+        self.assertEqual(slot["staff_ids"], [self.staff.id, other.id])
+
+    def test_past_date_returns_no_slots(self):
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        url = f"/api/bookings/availability/?service={self.service.id}&date={yesterday}"
+        self.api.get(url)  # warms the cached Service
+        with self.assertNumQueries(0):
+            r = self.api.get(url)
+        self.assertEqual(r.json(), {"slots": []})
+
+    def test_availability_respects_staff_windows(self):
+        # Staff works 13:00–15:00 tomorrow only
+        day = self.slot_start.date()
+        StaffAvailability.objects.create(
+            staff=self.staff,
+            start_time=timezone.make_aware(datetime.combine(day, time(13, 0))),
+            end_time=timezone.make_aware(datetime.combine(day, time(15, 0))),
+        )
+        hours = sorted(datetime.fromisoformat(t).hour for t in self._slot_times())
+        self.assertEqual(hours, [13, 14])
+
+    def test_availability_etag_returns_304(self):
+        url = f"/api/bookings/availability/?service={self.service.id}&date={self.date_str}"
+        r1 = self.api.get(url)
+        etag = r1["ETag"]
+        # Revalidation is answered from the cached entry alone
+        with self.assertNumQueries(0):
+            r2 = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r2.status_code, 304)
+        self.assertEqual(r2.content, b"")
+
+        # A new booking changes the slot list, so the old ETag no longer matches
+        Booking.objects.create(
+            client=self.client_profile, service=self.service, staff=self.staff, start_time=self.slot_start
+        )
+        r3 = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r3.status_code, 200)
+        self.assertNotEqual(r3["ETag"], etag)
+
+    def test_availability_etag_survives_cache_loss(self):
+        # Version keys read back as missing (eviction, restart, another worker's
+        # LocMemCache) must not revive an ETag for a slot list that has changed.
+        url = f"/api/bookings/availability/?service={self.service.id}&date={self.date_str}"
+        cache.clear()  # fresh process: no version keys yet
+        etag = self.api.get(url)["ETag"]
+        Booking.objects.create(
+            client=self.client_profile, service=self.service, staff=self.staff, start_time=self.slot_start
+        )
+        cache.clear()
+        r = self.api.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(r.status_code, 200)
+        self.assertNotIn(self.slot_start.isoformat(), {s["start_time"] for s in r.json()["slots"]})
+
+    def test_availability_etag_for_today(self):
+        url = f"/api/bookings/availability/?service={self.service.id}&date={timezone.localdate().isoformat()}"
+        r1 = self.api.get(url)
+        self.assertEqual(r1.status_code, 200)
+        r2 = self.api.get(url, HTTP_IF_NONE_MATCH=r1["ETag"])
+        self.assertEqual(r2.status_code, 304)
+
+    def test_availability_date_parsing(self):
+        base = f"/api/bookings/availability/?service={self.service.id}&date="
+        self.assertEqual(self.api.get(base + f"{self.date_str}T08:30").status_code, 200)
+        for bad in ("tomorrow", "2025-1-01", "2025-13-01", "2025-01-01X", "9999-12-31"):
+            self.assertEqual(self.api.get(base + bad).status_code, 400, bad)
+
+
+class BookingListQueryTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        service = Service.objects.create(
+            name="Cut", description="", duration_minutes=60, price=Decimal("50.00")
+        )
+        staff = Staff.objects.create(name="Stylist A", email="stylista@example.com", role="Stylist")
+        for i in range(3):
+            client = ClientProfile.objects.create(
+                name=f"Client {i}", email=f"client{i}@example.com", phone="5551234"
+            )
+            Booking.objects.create(
+                client=client,
+                service=service,
+                staff=staff,
+                start_time=timezone.now() + timedelta(days=i + 1),
+            )
+
+    def test_list_does_not_query_per_row(self):
+        # client/service/staff render as PKs from the *_id columns: one SELECT total
+        with self.assertNumQueries(1):
+            r = self.api.get("/api/bookings/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(len(r.json()["results"]), 3)
+
+    def test_detail_is_single_query(self):
+        booking = Booking.objects.first()
+        with self.assertNumQueries(1):
+            r = self.api.get(f"/api/bookings/{booking.id}/")
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.json()["client"], booking.client_id)
+
+
+class ClientProfileCreateTests(TestCase):
+    def setUp(self):
+        self.api = APIClient()
+        self.payload = {"name": "Client One", "email": "Client1@Example.com", "phone": "5551234"}
+
+    def test_reuses_existing_profile_case_insensitively(self):
+        r1 = self.api.post("/api/clients/", self.payload, format="json")
+        self.assertEqual(r1.status_code, 201, f"Unexpected: {r1.status_code} body={r1.content}")
+
+        again = {"name": "client one", "email": "client1@example.com", "phone": "5551234"}
+        r2 = self.api.post("/api/clients/", again, format="json")
+        self.assertEqual(r2.status_code, 200, f"Unexpected: {r2.status_code} body={r2.content}")
+        self.assertEqual(r2.json()["id"], r1.json()["id"])
+        self.assertEqual(ClientProfile.objects.count(), 1)
+
+    def test_list_is_paginated(self):
+        ids = [
+            ClientProfile.objects.create(name=f"Client {i}", email=f"c{i}@example.com", phone=f"555000{i}").id
+            for i in range(3)
+        ]
+        with mock.patch.object(ClientProfileCursorPagination, "page_size", 2):
+            r1 = self.api.get("/api/clients/")
+            self.assertEqual(r1.status_code, 200, f"Unexpected: {r1.status_code} body={r1.content}")
+            page1 = r1.json()
+            self.assertEqual([c["id"] for c in page1["results"]], ids[:2])
+            self.assertIsNotNone(page1["next"])
+
+            page2 = self.api.get(page1["next"]).json()
+        self.assertEqual([c["id"] for c in page2["results"]], ids[2:])
+        self.assertIsNone(page2["next"])
+
+    def test_db_rejects_case_variant_duplicate(self):
+        ClientProfile.objects.create(**self.payload)
+        with self.assertRaises(IntegrityError):
+            ClientProfile.objects.create(name="CLIENT ONE", email="client1@example.com", phone="5551234")
+
+    def test_full_clean_reports_duplicate_once(self):
+        ClientProfile.objects.create(**self.payload)
+        dup = ClientProfile(name="CLIENT ONE", email="client1@example.com", phone="5551234")
+        with self.assertRaises(ValidationError) as ctx:
+            dup.full_clean()
+        self.assertEqual(
+            ctx.exception.messages, ["A client with the same name, email, and phone already exists."]
+        )
+
+
+class BookingsCalendarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        User.objects.create_user(username="staff1", password="Password123!", is_staff=True)
+        self.client.login(username="staff1", password="Password123!")
+
+        service = Service.objects.create(
+            name="Cut", description="", duration_minutes=60, price=Decimal("50.00")
+        )
+        staff = Staff.objects.create(name="Stylist A", email="stylista@example.com", role="Stylist")
+        client = ClientProfile.objects.create(name="Client One", email="client1@example.com", phone="5551234")
+
+        self.day = (timezone.localdate() + timedelta(days=1))
+        start = timezone.make_aware(datetime.combine(self.day, time(10, 30)))
+        self.booking = Booking.objects.create(client=client, service=service, staff=staff, start_time=start)
+        Booking.objects.create(
+            client=client, service=service, start_time=start + timedelta(hours=2), status="CANCELLED"
+        )
+
+    def _get(self):
+        return self.client.get(f"/admin/bookings-calendar/?year={self.day.year}&month={self.day.month}")
+
+    def test_month_grid_lists_active_bookings(self):
+        r = self._get()
+        self.assertEqual(r.status_code, 200)
+
+        cells = list(r.context["cells"])
+        first_weekday = self.day.replace(day=1).weekday()
+        self.assertTrue(all(c.blank for c in cells[:first_weekday]))
+        day_cells = [c for c in cells if not c.blank]
+        self.assertEqual([c.day for c in day_cells][:1], [1])
+        self.assertEqual(len(cells) % 7, 0)  # padded to full weeks
+
+        entries = [e for c in day_cells if c.day == self.day.day for e in c.bookings]
+        self.assertEqual(len(entries), 1)  # cancelled booking is hidden
+        entry = entries[0]
+        self.assertEqual(entry.id, self.booking.id)
+        self.assertEqual(entry.time, "10:30 AM")
+        self.assertEqual(entry.client, "Client One")
+        self.assertEqual(entry.service, "Cut")
+        self.assertEqual(entry.staff, "Stylist A")
+        self.assertContains(r, "Client One")
+
+    def test_rendered_month_is_cached_until_a_booking_changes(self):
+        self._get()
+        with self.assertNumQueries(2):  # session + user for the staff check only
+            r = self._get()
+        self.assertContains(r, "Client One")
+
+        self.booking.status = "CANCELLED"
+        self.booking.save()
+        self.assertNotContains(self._get(), "Client One")
+
+    def test_rescheduled_booking_leaves_its_old_month(self):
+        self.assertContains(self._get(), "Client One")
+        # Move it well into another month (~40 days later)
+        self.booking.start_time += timedelta(days=40)
+        self.booking.save()
+        self.assertNotContains(self._get(), "Client One")
+
+    def test_json_rows(self):
+        r = self.client.get(f"/admin/bookings-calendar.json?year={self.day.year}&month={self.day.month}")
+        self.assertEqual(r.status_code, 200)
+        data = r.json()
+        self.assertEqual((data["year"], data["month"]), (self.day.year, self.day.month))
+        self.assertEqual(
+            data["rows"],
+            [[self.booking.id, timezone.localtime(self.booking.start_time).isoformat(), "Client One", "Cut", "Stylist A"]],
+        )
+
+    def test_ndjson_streams_cells(self):
+        r = self.client.get(
+            f"/admin/bookings-calendar/?year={self.day.year}&month={self.day.month}&format=ndjson"
+        )
+        self.assertEqual(r["Content-Type"], "application/x-ndjson")
+        cells = [json.loads(line) for line in b"".join(r.streaming_content).splitlines()]
+        self.assertEqual(len(cells) % 7, 0)
+        day = next(c for c in cells if not c["blank"] and c["day"] == self.day.day)
+        self.assertEqual([e["id"] for e in day["bookings"]], [self.booking.id])
+
+
+class CancelBookingFormTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        service = Service.objects.create(
+            name="Cut", description="", duration_minutes=60, price=Decimal("50.00")
+        )
+        client = ClientProfile.objects.create(name="Client One", email="client1@example.com", phone="5551234")
+        self.booking = Booking.objects.create(
+            client=client, service=service, start_time=timezone.now() + timedelta(days=1)
+        )
+        self.form = {
+            "booking_id": str(self.booking.id),
+            "name": "client one",
+            "email": "Client1@Example.com",
+            "phone": "5551234",
+            "reason": "Running late",
+        }
+
+    def _post(self, **overrides):
+        return self.client.post("/api/bookings/cancel/submit/", {**self.form, **overrides})
+
+    def test_cancels_with_matching_details(self):
+        r = self._post()
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertTrue(r.json()["ok"])
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "CANCELLED")
+        self.assertIn("[Cancel reason] Running late", self.booking.notes)
+
+        # A repeat submit is rejected by the conditional UPDATE
+        self.assertEqual(self._post().status_code, 400)
+
+    def test_cancel_reason_keeps_notes_saved_meanwhile(self):
+        stale = Booking.objects.get(pk=self.booking.pk)
+        Booking.objects.filter(pk=self.booking.pk).update(notes="Prefers Stylist A")
+        BookingManager().cancel_booking(stale, reason="Running late")
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.notes, "Prefers Stylist A\n[Cancel reason] Running late")
+        self.assertEqual(stale.notes, self.booking.notes)
+
+    def test_rejects_mismatched_details(self):
+        self.assertEqual(self._post(email="someone@example.com").status_code, 400)
+        self.booking.refresh_from_db()
+        self.assertEqual(self.booking.status, "CONFIRMED")
@@ -9,23 +9,29 @@
 #   * Booking creation requires NO login. Public flow: create client -> create booking.
 #
 # Change log (2025-12-03):
-# - On successful booking creation, set status="confirmed" and save.
-#   This triggers the notifications.signals.post_save hook to send the
-#   confirmation email using Django's email backend configured in settings.
+# - Bookings are created with status="CONFIRMED" (single INSERT).
+#   This triggers the notifications.signals.post_save hook, which queues the
+#   confirmation email as a Celery task (notifications/tasks.py).
 # - Added server-side fallback: if posted staff is busy or missing, auto-assign
 #   a free staff (re-validates with AvailabilityEngine at create time).
+# - Availability results are cached per service/day (see
+#   services/availability_cache.py); booking/signals.py invalidates them.
 #
+import hashlib
+import json
 import re
-from django.utils.dateparse import parse_date
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
 
-from .models import ClientProfile, Service, Staff, Booking, Feedback
+from .models import ClientProfile, Service, Staff, Booking, Feedback, PriceHistory
 from .serializers import (
     ClientProfileSerializer,
     ServiceSerializer,
@@ -34,10 +40,25 @@ from .serializers import (
     FeedbackSerializer,
 )
 from .services.booking_manager import BookingManager
-from .services.notification_service import NotificationService  # legacy console helper
-from .services.availability_engine import AvailabilityEngine  # computes open slots
+from .services.slot_utils import date_to_range
+from .services.lookup_cache import get_service, get_staff_list, peek_service, remember_service
+from .services.availability_cache import (
+    availability_key,
+    get_cached_slots,
+    set_cached_slots,
+)
 
 PHONE_RE = re.compile(r"^\d{7,15}$")
+DATE_PREFIX_RE = re.compile(r"^(\d{4}-\d{2}-\d{2})(?:[T ]|$)")
+
+# Stateless services, built once per worker process. The manager's
+# AvailabilityEngine doubles as the viewset's slot engine.
+_MANAGER = BookingManager()
+_ENGINE = _MANAGER.availability
+
+
+def _availability_etag(tag: str) -> str:
+    return quote_etag(hashlib.md5(tag.encode()).hexdigest())
 
 
 # -------------------- Permissions --------------------
@@ -52,11 +73,39 @@ class IsStaffOrReadOnly(BasePermission):
         return bool(request.user and request.user.is_staff)
 
 
+# -------------------- Pagination --------------------
+class BookingCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the booking list: each page is an index range scan
+    from the cursor position instead of an OFFSET that re-reads earlier rows.
+    id breaks ties between bookings with the same start_time.
+    """
+    ordering = ("-start_time", "-id")
+    page_size = 50
+
+
+class ClientProfileCursorPagination(CursorPagination):
+    """
+    Keyset pagination for the client list (primary key order).
+    """
+    ordering = ("id",)
+    page_size = 50
+
+
+class FeedbackCursorPagination(CursorPagination):
+    """
+    Keyset pagination for feedback, newest first; id breaks created_at ties.
+    """
+    ordering = ("-created_at", "-id")
+    page_size = 50
+
+
 # -------------------- ViewSets --------------------
 # booking/views.py (excerpt)
 class ClientProfileViewSet(viewsets.ModelViewSet):
     queryset = ClientProfile.objects.all().order_by("id")
     serializer_class = ClientProfileSerializer
+    pagination_class = ClientProfileCursorPagination
 
     def create(self, request, *args, **kwargs):
         """
@@ -74,29 +123,29 @@ class ClientProfileViewSet(viewsets.ModelViewSet):
             return Response({"detail": "name, email, and phone are required."}, status=400)
 
         # Keep the same phone rule as booking (digits-only, 7–15)
-        import re
-        if not re.match(r"^\d{7,15}$", phone):
+        if not PHONE_RE.match(phone):
             return Response({"detail": "Phone must be digits only, 7 to 15 digits."}, status=400)
 
-        # Try to find an existing profile (case-insensitive for name/email; phone exact)
-        # NOTE: Using iexact for name/email to be user-friendly.
-        existing = ClientProfile.objects.filter(
-            name__iexact=name,
-            email__iexact=email,
+        # Validate field formats (email, lengths) before touching the DB
+        serializer = self.get_serializer(data={"name": name, "email": email, "phone": phone})
+        serializer.is_valid(raise_exception=True)
+
+        # Find-or-create (case-insensitive for name/email; phone exact).
+        # matching() is an index lookup on the clientprofile_ci_uniq expression index,
+        # and the constraint makes this race-safe: if a concurrent request inserts
+        # first, get_or_create catches the IntegrityError and re-reads.
+        profile, created = ClientProfile.objects.matching(name, email).get_or_create(
             phone=phone,
-        ).first()
+            defaults={"name": name, "email": email},
+        )
 
-        if existing:
+        data = self.get_serializer(profile).data
+        if not created:
             # Return existing record (id, etc.) with 200 OK
-            data = self.get_serializer(existing).data
             return Response(data, status=200)
 
-        # Create a new one if not found
-        serializer = self.get_serializer(data={"name": name, "email": email, "phone": phone})
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return Response(serializer.data, status=201, headers=headers)
+        headers = self.get_success_headers(data)
+        return Response(data, status=201, headers=headers)
 
 
 class ServiceViewSet(viewsets.ModelViewSet):
@@ -127,7 +176,6 @@ class ServiceViewSet(viewsets.ModelViewSet):
         old_price = service.price
         instance = serializer.save()
         if "price" in serializer.validated_data and instance.price != old_price:
-            from .models import PriceHistory
             PriceHistory.objects.create(
                 service=instance,
                 old_price=old_price,
@@ -143,6 +191,7 @@ class StaffViewSet(viewsets.ModelViewSet):
 class BookingViewSet(viewsets.ModelViewSet):
     """
     Endpoints:
+    - GET    /api/bookings/                   list, cursor-paginated (?cursor=...)
     - POST   /api/bookings/                   create (SRS 1.0, 6.0, 7.0)
     - POST   /api/bookings/{id}/cancel/       cancel with 2h cutoff (SRS 3.0)
     - GET    /api/bookings/availability/      availability (SRS 7.0)
@@ -152,8 +201,9 @@ class BookingViewSet(viewsets.ModelViewSet):
     """
     queryset = Booking.objects.all().order_by("-start_time")
     serializer_class = BookingSerializer
-    manager = BookingManager()
-    notifier = NotificationService()  # legacy console notifier (kept for cancel)
+    pagination_class = BookingCursorPagination
+    manager = _MANAGER
+    engine = _ENGINE
 
     def create(self, request, *args, **kwargs):
         """
@@ -161,11 +211,20 @@ class BookingViewSet(viewsets.ModelViewSet):
         - Requires: client (ClientProfile PK), service (PK), start_time (ISO).
         - Optional: staff (PK), notes (str).
         - Blocks inactive services.
-        - IMPORTANT: After creating the booking, immediately set status to "confirmed"
-          and save. This triggers notifications.signals.post_save to send a
-          real email confirmation to the client's email address using the configured
-          EMAIL_BACKEND.
+        - IMPORTANT: The booking is created with status="CONFIRMED" in a single
+          INSERT. That triggers notifications.signals.post_save, which queues the
+          confirmation email to the client's address (configured EMAIL_BACKEND).
         """
+        # Fast reject: if the Service is already cached and inactive, answer before
+        # running serializer validation (which queries client/service/staff).
+        service_id = request.data.get("service")
+        cached_service = peek_service(service_id) if str(service_id).isdigit() else None
+        if cached_service is not None and not cached_service.active:
+            return Response(
+                {"detail": "This service is not currently available."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         data = serializer.validated_data
@@ -178,6 +237,7 @@ class BookingViewSet(viewsets.ModelViewSet):
 
         # Block inactive services (safer for public API)
         if hasattr(service, "active") and not service.active:
+            remember_service(service)  # so repeat attempts hit the fast reject above
             return Response(
                 {"detail": "This service is not currently available."},
                 status=status.HTTP_400_BAD_REQUEST,
@@ -187,19 +247,14 @@ class BookingViewSet(viewsets.ModelViewSet):
         if timezone.is_naive(start_time):
             start_time = timezone.make_aware(start_time, timezone.get_current_timezone())
 
-        # Server-side fallback: auto-assign any free staff if provided staff is busy or missing
-        eng = AvailabilityEngine()
-
-        def staff_is_free(s):
-            return eng.is_slot_available_for_staff(s, service, start_time)
+        # Server-side fallback: auto-assign any free staff if provided staff is busy or missing.
+        # first_free_staff batches the busy check for all staff (no per-staff queries);
+        # only the PK is needed to assign the booking, so skip the other columns.
+        eng = self.engine
+        if staff is None or not eng.is_slot_available_for_staff(staff, service, start_time):
+            staff = eng.first_free_staff(service, start_time, Staff.objects.only("id").order_by("id"))
 
-        if staff is None or not staff_is_free(staff):
-            for s in Staff.objects.all().order_by("id"):
-                if staff_is_free(s):
-                    staff = s
-                    break
-
-        if staff is None or not staff_is_free(staff):
+        if staff is None:
             return Response({"detail": "No staff available for that time."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Create booking via domain manager to keep logic centralized
@@ -210,43 +265,33 @@ class BookingViewSet(viewsets.ModelViewSet):
                 staff=staff,
                 start_time=start_time,
                 notes=notes,
+                status="CONFIRMED",  # confirmed on INSERT; post_save sends the email
             )
         except ValueError as e:
             # If any additional domain rule blocks creation, return 400 with reason
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Immediately confirm booking so the post_save signal sends the email.
-        if getattr(booking, "status", None) != "CONFIRMED":
-            booking.status = "CONFIRMED"
-            booking.save(update_fields=["status"])
-
-        # Re-serialize to include updated status
-        out = BookingSerializer(booking)
-        headers = self.get_success_headers(out.data)
-        return Response(out.data, status=status.HTTP_201_CREATED, headers=headers)
+        # Serialize with the original serializer (no second serializer instance)
+        serializer.instance = booking
+        headers = self.get_success_headers(serializer.data)
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
     @action(detail=True, methods=["post"])
     def cancel(self, request, pk=None):
         """
         Cancel a booking (public). Respects 2-hour cutoff.
-        On success, sends a cancellation notification (legacy console notifier retained).
+        BookingManager flips the status with one conditional UPDATE and fires
+        post_save once, which queues the cancellation email (notifications.signals).
         """
-        booking = get_object_or_404(Booking, pk=pk)
-
-        # capture before cancellation (for email/notification if needed)
-        snapshot = {
-            "id": booking.id,
-            "client_email": booking.client.email,
-            "start_time": booking.start_time,
-        }
+        # client/service are read by the post_save receivers (email, cache
+        # invalidation); join them here instead of lazy-loading each one.
+        booking = get_object_or_404(Booking.objects.select_related("client", "service"), pk=pk)
 
         try:
             self.manager.cancel_booking(booking, cutoff_minutes=120)
         except ValueError as e:
             return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        # Existing console cancellation (can be upgraded to real email later)
-        self.notifier.send_cancellation(snapshot)
         return Response({"detail": "Booking cancelled."}, status=status.HTTP_200_OK)
 
     @action(detail=False, methods=["get"], url_path="availability")
@@ -255,6 +300,9 @@ class BookingViewSet(viewsets.ModelViewSet):
         GET /api/bookings/availability/?service=ID&date=YYYY-MM-DD
         Also accepts inputs that include time; we trim to the date part.
         Filters out past slots relative to current timezone.
+        Slot lists are cached briefly per service/day (see availability_cache).
+        Responses carry an ETag: a hash of the slot list, computed once per cache
+        entry and stored with it; a matching If-None-Match returns 304.
         """
         service_id = (request.query_params.get("service") or "").strip()
         date_raw = (request.query_params.get("date") or "").strip()
@@ -265,56 +313,81 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Normalize to 'YYYY-MM-DD'
-        if "T" in date_raw:
-            date_str = date_raw.split("T", 1)[0].strip()
-        elif " " in date_raw:
-            date_str = date_raw.split(" ", 1)[0].strip()
-        else:
-            date_str = date_raw
-
-        # Validate date format
-        d = parse_date(date_str)
-        if d is None:
+        # Normalize to 'YYYY-MM-DD' (also accepts "YYYY-MM-DDTHH:MM..." or "YYYY-MM-DD HH:MM...").
+        # Calendar validity (e.g. month 13) is checked by date_to_range below.
+        m = DATE_PREFIX_RE.match(date_raw)
+        if not m:
             return Response(
                 {"detail": "Invalid date format. Use YYYY-MM-DD."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
-
-        # Resolve service or 404
-        service = get_object_or_404(Service, pk=service_id)
-
-        # Convert date to TZ-aware day start
-        from .services.slot_utils import date_to_range
+        date_str = m.group(1)
+
+        # Resolve service (cached; see lookup_cache) or 404
+        if not service_id.isdigit():
+            return Response({"detail": "Invalid service."}, status=status.HTTP_400_BAD_REQUEST)
+        service = get_service(int(service_id))
+        if service is None:
+            return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        # Convert date to TZ-aware day start. The regex above guarantees the shape,
+        # so only an impossible calendar date (ValueError) or one at the very end
+        # of the calendar (OverflowError computing the day's end) can fail here.
         try:
             day_start, _day_end = date_to_range(date_str)
-        except Exception:
+        except (ValueError, OverflowError):
             return Response(
                 {"detail": "Invalid date format. Use YYYY-MM-DD."},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Compute availability
-        engine = AvailabilityEngine()
-        staff_qs = Staff.objects.all().order_by("id")
-        data = engine.find_available_slots(service, day_start, staff_qs)
-
-        # Filter out past slots (today)
-        tz = timezone.get_current_timezone()
+        # Past days have no bookable slots: answer before touching the cache or engine.
+        # One clock read per request: "today", the engine cutoff and the past-slot
+        # filter all agree on the same instant.
         now = timezone.now()
-        filtered = []
-        for s in data["slots"]:
-            start_dt = timezone.datetime.fromisoformat(s["start_time"])
-            if start_dt.tzinfo is None:
-                start_dt = tz.localize(start_dt)
-            else:
-                start_dt = start_dt.astimezone(tz)
-            if start_dt > now:
-                filtered.append(s)
+        req_date = day_start.date()
+        today = timezone.localdate(now)
+        if req_date < today:
+            return Response({"slots": []})
+
+        # Compute availability (or reuse the cached slot list for this service/day).
+        # The engine returns (start, staff_ids) tuples; we build the response dicts
+        # and each slot's start as Unix seconds (for the past-slot filter) side by side.
+        # The ETag hashes the slot list itself and is stored with the entry, so a
+        # revalidation that hits the cache costs no hashing or serialization.
+        cache_key = availability_key(service.pk, date_str)
+        cached = get_cached_slots(cache_key)
+        if cached is None:
+            rows = self.engine.available_slot_rows(
+                service, day_start, get_staff_list(), min_start=now
+            )
+            slots = [{"start_time": start.isoformat(), "staff_ids": ids} for start, ids in rows]
+            epochs = [int(start.timestamp()) for start, _ids in rows]
+            slots_etag = _availability_etag(json.dumps(slots))
+            set_cached_slots(cache_key, slots, epochs, slots_etag)
+        else:
+            slots, epochs, slots_etag = cached
+
+        # Filter out past slots. Only "today" can have any: future days are returned
+        # as-is. The engine already skipped slots that were past when the list was
+        # computed; this catches ones that have passed since it was cached, so the
+        # same entry stays valid as the day goes on (int compare, no parsing).
+        if req_date > today:
+            filtered = slots
+            etag = slots_etag
+        else:
+            now_epoch = int(now.timestamp())
+            filtered = [s for s, epoch in zip(slots, epochs) if epoch > now_epoch]
+            # Today's list also shrinks as slots pass; only ever from the front,
+            # so the remaining count pins it down for a given slot list.
+            etag = _availability_etag(f"{slots_etag}:{len(filtered)}")
 
-        return Response({"slots": filtered})
+        response = Response({"slots": filtered})
+        response["ETag"] = etag
+        return get_conditional_response(request, etag=etag, response=response)
 
 
 class FeedbackViewSet(viewsets.ModelViewSet):
     queryset = Feedback.objects.all().order_by("-created_at")
-    serializer_class = FeedbackSerializer
\ No newline at end of file
+    serializer_class = FeedbackSerializer
+    pagination_class = FeedbackCursorPagination
\ No newline at end of file
@@ -11,16 +11,136 @@
 # Behavior:
 # - Only staff (or superusers) can access (enforced by @staff_member_required).
 # - Query params: ?year=YYYY&month=MM (defaults to current month if missing/invalid).
+# - ?format=ndjson streams the month's cells as JSON lines (one cell per line).
+# - /admin/bookings-calendar.json returns the month's bookings as compact rows
+#   for script-rendered calendars (bookings_calendar_json).
 # - Excludes bookings with status = "CANCELLED" so the calendar reflects availability.
+# - Rendered months are cached (services/calendar_cache.py); booking/signals.py
+#   drops a month when one of its bookings changes.
 #
+from collections import namedtuple
 from datetime import datetime
+from itertools import groupby
+from operator import itemgetter
+from zoneinfo import ZoneInfo
 import calendar
+import json
 
+from django.conf import settings
 from django.contrib.admin.views.decorators import staff_member_required
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.utils import timezone
 
 from .models import Booking
+from .services.calendar_cache import get_cached_calendar, set_cached_calendar
+
+# Month names resolved once at import ("" at index 0, so index by month number)
+_MONTH_NAMES = tuple(calendar.month_name)
+_TIME_FMT = "%I:%M %p"  # e.g. "02:30 PM"
+_CALENDAR = calendar.Calendar(firstweekday=0)  # weeks start on Monday
+# settings.TIME_ZONE is fixed for the process and the app never calls
+# timezone.activate(), so resolve the zone once instead of per request.
+_TZ = ZoneInfo(settings.TIME_ZONE)
+
+# Grid cells and booking entries are read-only template data; namedtuples are
+# smaller and cheaper to build than dicts, and templates read them the same way
+# ({{ cell.day }}, {{ b.time }}).
+Cell = namedtuple("Cell", ["blank", "day", "bookings"])
+Entry = namedtuple("Entry", ["time", "client", "service", "staff", "status", "id"])
+_BLANK = Cell(True, 0, ())
+
+
+def _row_to_entry(b, tz):
+    """
+    (local day number, Entry) for one .values() booking row.
+    """
+    local_start = b["start_time"].astimezone(tz)  # aware from the DB (USE_TZ)
+    return local_start.day, Entry(
+        local_start.strftime(_TIME_FMT),
+        b["client__name"] or "Client",
+        b["service__name"] or "Service",
+        b["staff__name"],  # None when no staff is assigned
+        b["status"],  # keep for a tiny badge if needed
+        b["id"],  # useful for linking to admin change view or details
+    )
+
+
+def _iter_cells(year, month, day_groups):
+    """
+    Yield the month grid's cells in order. day_groups is an iterator of
+    (day, [entries]) in ascending day order; each day's bookings are pulled
+    from it only when the grid reaches that day, so nothing is buffered.
+    """
+    pending = next(day_groups, None)
+    for d in _CALENDAR.itermonthdays(year, month):
+        if not d:
+            yield _BLANK
+            continue
+        bookings = ()
+        if pending is not None and pending[0] == d:
+            bookings = pending[1]
+            pending = next(day_groups, None)
+        yield Cell(False, d, bookings)
+
+
+def _cell_json(cell) -> str:
+    """
+    One NDJSON line for a cell (entries as objects, same keys as the template uses).
+    """
+    if cell.blank:
+        return '{"blank": true}\n'
+    return json.dumps({
+        "blank": False,
+        "day": cell.day,
+        "bookings": [entry._asdict() for entry in cell.bookings],
+    }) + "\n"
+
+
+def _parse_month(request, tz):
+    """
+    (year, month) from ?year=&month=, falling back to the current month.
+    """
+    today = timezone.now().astimezone(tz)
+    try:
+        year = int(request.GET.get("year", today.year))
+        month = int(request.GET.get("month", today.month))
+        if not (1 <= month <= 12):
+            raise ValueError()
+    except Exception:
+        year, month = today.year, today.month
+    return year, month
+
+
+def _adjacent_months(year, month):
+    """
+    ((prev_year, prev_month), (next_year, next_month)), wrapping Dec <-> Jan.
+    """
+    prev_y, prev_m = (year - 1, 12) if month == 1 else (year, month - 1)
+    next_y, next_m = (year + 1, 1) if month == 12 else (year, month + 1)
+    return (prev_y, prev_m), (next_y, next_m)
+
+
+def _month_bounds(year, month, tz):
+    """
+    Timezone-aware [start, end) for the month: first day 00:00 to the first day
+    of the next month 00:00. ZoneInfo handles DST from the constructor.
+    """
+    _prev, (next_y, next_m) = _adjacent_months(year, month)
+    return datetime(year, month, 1, tzinfo=tz), datetime(next_y, next_m, 1, tzinfo=tz)
+
+
+def _active_bookings(start_dt, end_dt):
+    """
+    Non-cancelled bookings starting in [start_dt, end_dt), ordered by start_time.
+    The exclusive upper bound also covers bookings in the last second of a month.
+    """
+    return (
+        Booking.objects
+        .filter(start_time__gte=start_dt, start_time__lt=end_dt)
+        .exclude(status="CANCELLED")  # Do not show cancelled bookings in the calendar
+        .order_by("start_time")
+    )
 
 
 @staff_member_required
@@ -37,86 +157,92 @@ def bookings_calendar(request):
       - We exclude bookings with status == "CANCELLED" so the calendar only shows active/confirmed entries.
       - We build a flat 'cells' list with leading blanks for the first week so the template can render a grid.
     """
-    # Determine the active timezone (as configured in settings TIME_ZONE)
-    tz = timezone.get_current_timezone()
-    today = timezone.localtime(timezone.now(), tz)
+    # The site timezone (settings TIME_ZONE), resolved at import
+    tz = _TZ
 
     # 1) Parse year/month safely with fallbacks
-    try:
-        year = int(request.GET.get("year", today.year))
-        month = int(request.GET.get("month", today.month))
-        if not (1 <= month <= 12):
-            raise ValueError()
-    except Exception:
-        year, month = today.year, today.month
+    year, month = _parse_month(request, tz)
+
+    # ?format=ndjson streams the cells as JSON lines instead of rendering HTML
+    as_ndjson = request.GET.get("format") == "ndjson"
 
-    # 2) Calculate timezone-aware month bounds:
-    #    start_dt = first day at 00:00:00
-    #    end_dt   = last day at 23:59:59 (to include bookings on the last day)
-    _, last_day_num = calendar.monthrange(year, month)
-    start_dt = timezone.make_aware(datetime(year, month, 1, 0, 0, 0), tz)
-    end_dt = timezone.make_aware(datetime(year, month, last_day_num, 23, 59, 59), tz)
+    # Repeat views of the same month reuse the rendered page
+    if not as_ndjson:
+        html = get_cached_calendar(year, month)
+        if html is not None:
+            return HttpResponse(html)
+
+    # 2) Previous/next month for the navigation links, and the month's
+    #    timezone-aware bounds [start_dt, end_dt)
+    (prev_y, prev_m), (next_y, next_m) = _adjacent_months(year, month)
+    start_dt, end_dt = _month_bounds(year, month, tz)
 
     # 3) Query month’s bookings, EXCLUDING cancelled ones.
-    #    We also fetch related client/service/staff for display without N+1 queries.
-    qs = (
-        Booking.objects
-        .filter(start_time__gte=start_dt, start_time__lte=end_dt)
-        .exclude(status="CANCELLED")  # Do not show cancelled bookings in the calendar
-        .select_related("client", "service", "staff")
-        .order_by("start_time")
+    #    .values() pulls only the display columns (client/service/staff names are
+    #    joined in the same SQL) and skips building model instances per row, so
+    #    no separate .only() is needed.
+    qs = _active_bookings(start_dt, end_dt).values(
+        "id", "start_time", "status", "client__name", "service__name", "staff__name"
     )
 
-    # 4) Build a map: day number -> list of bookings with display fields
-    #    We convert each booking’s start_time to the current tz for correct day assignment.
-    days_map = {d: [] for d in range(1, last_day_num + 1)}
-    for b in qs:
-        local_start = timezone.localtime(b.start_time, tz)
-        # Prepare readable fields for template:
-        entry = {
-            "time": local_start.strftime("%I:%M %p"),
-            "client": getattr(b.client, "name", "Client"),
-            "service": getattr(b.service, "name", "Service"),
-            "staff": getattr(getattr(b, "staff", None), "name", None),
-            "status": getattr(b, "status", ""),  # keep for a tiny badge if needed
-            "id": b.id,  # useful for linking to admin change view or details
-        }
-        days_map[local_start.day].append(entry)
-
-    # 5) Build 'cells' to simplify template rendering:
-    #    calendar.monthrange(year, month)[0] gives the first weekday (0=Mon..6=Sun).
-    #    We create that many leading blanks and then a cell for each day.
-    first_weekday = calendar.monthrange(year, month)[0]  # 0=Mon, 6=Sun
-    cells = [{"blank": True} for _ in range(first_weekday)]
-    for d in range(1, last_day_num + 1):
-        cells.append({
-            "blank": False,
-            "day": d,
-            "bookings": days_map[d],  # list (possibly empty)
-        })
-
-    # 6) Calculate previous/next month for navigation links
-    #    We adjust year boundaries (Dec -> Jan next year, Jan -> Dec previous year).
-    prev_y, prev_m = year, month - 1
-    next_y, next_m = year, month + 1
-    if prev_m == 0:
-        prev_m = 12
-        prev_y -= 1
-    if next_m == 13:
-        next_m = 1
-        next_y += 1
-
-    # 7) Context to render
+    # 4) Group bookings by local day: (day, [Entry, ...]) pairs.
+    #    Rows arrive ordered by start_time, so each local day's bookings are
+    #    contiguous: groupby buckets them in one pass without per-row dict lookups.
+    #    Only days that actually have bookings produce a group. Everything here
+    #    is lazy; rows are read as the cells below are consumed.
+    entries = (_row_to_entry(b, tz) for b in qs.iterator())
+    day_groups = (
+        (day, [entry for _day, entry in group])
+        for day, group in groupby(entries, key=itemgetter(0))
+    )
+
+    # 5) Build 'cells' to simplify template rendering, in one pass over the grid.
+    #    itermonthdays pads the first/last week with blank cells so every row is full.
+    cells = _iter_cells(year, month, day_groups)
+    if as_ndjson:
+        return StreamingHttpResponse(
+            (_cell_json(cell) for cell in cells),
+            content_type="application/x-ndjson",
+        )
+
+    # 6) Context to render
     ctx = {
         "year": year,
         "month": month,
-        "month_name": calendar.month_name[month],
-        "cells": cells,                   # flat list used by the template to render the grid
+        "month_name": _MONTH_NAMES[month],
+        "cells": list(cells),             # flat list used by the template to render the grid
         "prev_year": prev_y, "prev_month": prev_m,
         "next_year": next_y, "next_month": next_m,
     }
 
-    # 8) Render using the app-root template:
+    # 7) Render using the app-root template:
     #    If your file is booking/templates/booking_calendar.html, this is the correct template name.
     #    (No subfolder path in the template name)
-    return render(request, "booking_calendar.html", ctx)
\ No newline at end of file
+    response = render(request, "booking_calendar.html", ctx)
+    set_cached_calendar(year, month, response.content)
+    return response
+
+
+@staff_member_required
+def bookings_calendar_json(request):
+    """
+    Month data for script-rendered calendars: GET /admin/bookings-calendar.json?year=&month=
+
+    Returns {"year", "month", "rows": [[id, start (local ISO), client, service, staff], ...]}
+    with the same month bounds and CANCELLED filter as the HTML page, but no
+    template rendering and no per-row dicts.
+    """
+    tz = _TZ
+    year, month = _parse_month(request, tz)
+    start_dt, end_dt = _month_bounds(year, month, tz)
+    rows = _active_bookings(start_dt, end_dt).values_list(
+        "id", "start_time", "client__name", "service__name", "staff__name"
+    )
+    return JsonResponse({
+        "year": year,
+        "month": month,
+        "rows": [
+            [bid, start.astimezone(tz).isoformat(), client, service, staff]
+            for bid, start, client, service, staff in rows.iterator()
+        ],
+    })
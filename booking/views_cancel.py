@@ -11,14 +11,16 @@
 # - If later you move the file under booking/templates/booking/cancel_booking.html,
 #   change the render() call to "booking/cancel_booking.html".
 #
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 
 from .models import Booking
 from .services.booking_manager import BookingManager
 
+# Stateless; built once per worker process instead of per request
+_manager = BookingManager()
+
 
 @require_http_methods(["GET"])
 def cancel_booking_page(request):
@@ -44,9 +46,10 @@ def cancel_booking_action(request):
       - reason     (optional) stored in notes
 
     Behavior:
-      - Find booking by ID and verify name/email/phone match booking.client
+      - Find booking by ID with matching client name/email/phone (single query)
       - Enforce business rule (e.g., 2-hour cutoff) using BookingManager
-      - Set status="CANCELLED", set cancellation_time, append reason -> notes
+      - BookingManager sets status="CANCELLED" + cancellation_time and appends
+        reason -> notes in one conditional UPDATE
       - notifications/signals.py will send emails on status change
     """
     booking_id = (request.POST.get("booking_id") or "").strip()
@@ -75,54 +78,40 @@ def cancel_booking_action(request):
     except ValueError:
         return JsonResponse({"ok": False, "message": "Invalid Booking ID."}, status=400)
 
-    # Find the booking or 404
-    booking = get_object_or_404(Booking, pk=bid_int)
-
-    # Confirm details match the booking record (case-insensitive for name/email; exact digits for phone)
-    if booking.client.name.strip().lower() != name.lower():
-        return JsonResponse(
-            {"ok": False, "message": "Provided name does not match this booking."},
-            status=400,
+    # Find the booking and confirm the details in one query (case-insensitive
+    # for name/email; exact digits for phone). A wrong ID and wrong details get
+    # the same answer, so the form can't be used to probe which part is wrong.
+    # client/service are read again by the post_save receivers (emails, cache
+    # invalidation), so join them and load only the columns those steps use.
+    booking = (
+        Booking.objects
+        .filter(
+            pk=bid_int,
+            client__name__iexact=name,
+            client__email__iexact=email,
+            client__phone=phone,
         )
-    if booking.client.email.strip().lower() != email.lower():
-        return JsonResponse(
-            {"ok": False, "message": "Provided email does not match this booking."},
-            status=400,
+        .select_related("client", "service")
+        .only(
+            "id", "start_time", "status", "notes",
+            "client__name", "client__email", "client__phone",
+            "service__name", "service__duration_minutes",
         )
-    if (booking.client.phone or "").strip() != phone:
+        .first()
+    )
+    if booking is None:
         return JsonResponse(
-            {"ok": False, "message": "Provided phone does not match this booking."},
+            {"ok": False, "message": "No booking matches those details."},
             status=400,
         )
 
-    # Already cancelled?
-    if booking.status == "CANCELLED":
-        return JsonResponse(
-            {"ok": False, "message": "This booking is already cancelled."},
-            status=400,
-        )
-
-    # Enforce policy via BookingManager (e.g., 2-hour cutoff)
-    manager = BookingManager()
+    # Enforce policy via BookingManager (2-hour cutoff, not already cancelled).
+    # The status flip is one conditional UPDATE, so a double submit can't cancel
+    # (and email) twice; post_save receivers still run.
     try:
-        # Many implementations of cancel_booking will update status, etc.
-        # We call it for policy; then ensure our fields are set for signals.
-        manager.cancel_booking(booking, cutoff_minutes=120)
-
-        # Ensure status/cancellation_time are set (if manager didn't do so)
-        if hasattr(booking, "status") and booking.status != "CANCELLED":
-            booking.status = "CANCELLED"
-        if hasattr(booking, "cancellation_time") and booking.cancellation_time is None:
-            booking.cancellation_time = timezone.now()
-
-        # Optionally append reason to notes for staff visibility (non-destructive)
-        if reason:
-            booking.notes = (booking.notes or "") + f"\n[Cancel reason] {reason}"
-
-        # Persist changes; signals on Booking post_save will send emails
-        booking.save(update_fields=["status", "cancellation_time", "notes"])
-
-        return JsonResponse({"ok": True, "message": "Your booking has been cancelled."})
+        _manager.cancel_booking(booking, cutoff_minutes=120, reason=reason)
     except ValueError as e:
-        # Raised when violating business rule (e.g., within 2 hours cutoff)
-        return JsonResponse({"ok": False, "message": str(e)}, status=400)
\ No newline at end of file
+        # Raised when violating business rule (cutoff) or already cancelled
+        return JsonResponse({"ok": False, "message": str(e)}, status=400)
+
+    return JsonResponse({"ok": True, "message": "Your booking has been cancelled."})
@@ -0,0 +1,23 @@
+"""
+Celery app for booking_system.
+
+Used for background work that should not block a request (e.g. sending
+booking emails, see notifications/tasks.py).
+
+Run a worker (needs CELERY_BROKER_URL, e.g. redis://localhost:6379/0):
+    celery -A booking_system worker -l info
+"""
+
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'booking_system.settings')
+
+app = Celery('booking_system')
+
+# Read CELERY_* settings from Django settings
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Find tasks.py in installed apps
+app.autodiscover_tasks()
@@ -68,13 +68,45 @@ TEMPLATES = [
 WSGI_APPLICATION = 'booking_system.wsgi.application'
 
 # Database
+# CONN_MAX_AGE keeps each worker's connection open between requests (seconds)
+# instead of reconnecting per request; health checks drop dead connections
+# before reuse. Matters most on PostgreSQL (TCP/TLS + auth per connect).
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Cache
+# - Redis (via django-redis) when REDIS_URL is set, e.g. redis://localhost:6379/1
+# - Otherwise an in-process LocMemCache so dev/tests need no extra services.
+# Used for short-lived availability results (booking/services/availability_cache.py).
+REDIS_URL = os.getenv("REDIS_URL", "")
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+            'OPTIONS': {'CLIENT_CLASS': 'django_redis.client.DefaultClient'},
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Celery (background email sending, see notifications/tasks.py)
+# - Set CELERY_BROKER_URL (e.g. redis://localhost:6379/0) and run a worker:
+#     celery -A booking_system worker -l info
+# - Without a broker, tasks run inline (eager) so dev/tests need no extra services.
+CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "")
+CELERY_TASK_ALWAYS_EAGER = not CELERY_BROKER_URL
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -11,7 +11,7 @@ from django.conf import settings
 from django.conf.urls.static import static
 
 # Staff master calendar (HTML)
-from booking.views_calendar import bookings_calendar
+from booking.views_calendar import bookings_calendar, bookings_calendar_json
 
 # Public cancellation views (HTML page + POST handler)
 from booking import views_cancel
@@ -23,6 +23,7 @@ urlpatterns = [
     # ================
     # NOTE: We place the calendar at /admin/bookings-calendar/ by convention.
     path("admin/bookings-calendar/", bookings_calendar, name="bookings_calendar"),
+    path("admin/bookings-calendar.json", bookings_calendar_json, name="bookings_calendar_json"),
 
     # Django admin
     path("admin/", admin.site.urls),
@@ -3,6 +3,6 @@ from notifications.models import Notification
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
-    list_display = ('user', 'message', 'sent', 'created_at')
-    list_filter = ('sent', 'created_at')
-    search_fields = ('user__username', 'message')
+    list_display = ('user', 'kind', 'booking', 'sent', 'created_at')
+    list_filter = ('kind', 'sent', 'created_at')
+    search_fields = ('user__name', 'user__email', 'message')
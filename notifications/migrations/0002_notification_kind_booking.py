@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:34
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_booking_active_start_idx'),
+        ('notifications', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='booking',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='booking.booking'),
+        ),
+        migrations.AddField(
+            model_name='notification',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('CONFIRMED', 'Booking confirmed'), ('CANCELLED', 'Booking cancelled')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(blank=True),
+        ),
+    ]
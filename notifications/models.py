@@ -6,17 +6,44 @@
 # Design:
 # - FK to booking.ClientProfile (not auth.User).
 # - 'sent' indicates delivery attempt result.
+# - New rows store what was sent (kind + booking) plus a one-line summary in
+#   'message' (booking id, service, time, client), not the full email text.
+#   display_message rebuilds the body from the booking while it exists; the
+#   summary is the searchable audit record that survives the booking being
+#   deleted (booking is SET_NULL). Rows written before kind/booking existed
+#   hold the full email text in 'message'.
 #
 from django.db import models
-from booking.models import ClientProfile
+from booking.models import Booking, ClientProfile
 
 
 class Notification(models.Model):
+    KIND_CHOICES = [
+        ("CONFIRMED", "Booking confirmed"),
+        ("CANCELLED", "Booking cancelled"),
+    ]
+
     user = models.ForeignKey(ClientProfile, on_delete=models.CASCADE)
-    message = models.TextField()
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True)
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, blank=True)
+    message = models.TextField(blank=True)  # summary (new rows) / full text (legacy rows)
     created_at = models.DateTimeField(auto_now_add=True)
     sent = models.BooleanField(default=False)
 
     def __str__(self) -> str:
         label = getattr(self.user, "name", None) or getattr(self.user, "email", "client")
-        return f"Notification to {label} at {self.created_at:%Y-%m-%d %H:%M}"
\ No newline at end of file
+        return f"Notification to {label} at {self.created_at:%Y-%m-%d %H:%M}"
+
+    @property
+    def display_message(self) -> str:
+        """
+        The email text: rebuilt from the booking for new rows, stored text for legacy
+        ones (and the stored summary once a new row's booking has been deleted).
+        """
+        if not self.kind or self.booking is None:
+            return self.message
+        from notifications.tasks import cancellation_body, confirmation_body  # tasks imports this module
+
+        if self.kind == "CANCELLED":
+            return cancellation_body(self.booking)
+        return confirmation_body(self.booking)
\ No newline at end of file
@@ -0,0 +1,172 @@
+# notifications/tasks.py
+#
+# Purpose:
+# - Celery tasks that send booking emails outside the request/response cycle.
+#   * send_booking_confirmation: CONFIRMED email + Notification record
+#   * send_booking_cancellation: CANCELLED email + Notification record + owner alert
+#
+# Notes:
+# - Tasks take IDs / plain dicts (not model instances) so they can be queued.
+# - With no CELERY_BROKER_URL configured, tasks run inline (see settings).
+# - Email failures are logged, never raised (same policy as before).
+#
+from celery import shared_task
+from django.core.mail import EmailMessage, get_connection, send_mail
+from django.conf import settings
+from django.utils import timezone
+
+from booking.models import Booking
+from notifications.models import Notification
+
+
+def send_email(subject: str, body: str, to_email: str):
+    """
+    Helper to send a single email.
+
+    In dev (console backend), this prints to terminal.
+    In demo/prod (SMTP backend with env vars or hardcoded settings), this sends a real email.
+
+    We never let an exception bubble up and break the caller.
+    """
+    if not to_email:
+        return
+    try:
+        send_mail(
+            subject=subject,
+            message=body,
+            from_email=getattr(settings, "DEFAULT_FROM_EMAIL", None),
+            recipient_list=[to_email],
+            fail_silently=False,  # raise so we can log; we still catch it below
+        )
+    except Exception as e:
+        print(f"[email] send error to {to_email}: {e}")
+
+
+def send_emails(messages: list):
+    """
+    Send several (subject, body, to_email) emails over one SMTP connection.
+    Entries without a recipient are skipped; errors are logged, never raised.
+    """
+    from_email = getattr(settings, "DEFAULT_FROM_EMAIL", None)
+    emails = [
+        EmailMessage(subject, body, from_email, [to_email])
+        for subject, body, to_email in messages
+        if to_email
+    ]
+    if not emails:
+        return
+    try:
+        with get_connection(fail_silently=False) as connection:
+            connection.send_messages(emails)
+    except Exception as e:
+        print(f"[email] batch send error ({len(emails)} messages): {e}")
+
+
+def confirmation_body(booking) -> str:
+    """
+    Client email body for a confirmed booking (client/service loaded).
+    """
+    dt_str = booking.start_time.strftime("%A, %B %d, %Y at %I:%M %p")
+    return (
+        f"Hi {booking.client.name},\n\n"
+        f"Your booking is confirmed.\n\n"
+        f"Booking ID: {booking.id}\n"
+        f"Service: {booking.service.name}\n"
+        f"Date & Time: {dt_str}\n\n"
+        f"We look forward to seeing you!\n"
+        f"— Hair by Lasheka"
+    )
+
+
+def cancellation_body(booking) -> str:
+    """
+    Client email body for a cancelled booking (client/service loaded).
+    """
+    dt_str = booking.start_time.strftime("%A, %B %d, %Y at %I:%M %p")
+    return (
+        f"Dear {booking.client.name},\n\n"
+        f"Your appointment for {booking.service.name} on {dt_str} has been cancelled.\n"
+        f"If this was unexpected, please reply to this email.\n"
+    )
+
+
+def notification_summary(booking, kind: str) -> str:
+    """
+    One-line audit summary stored on the Notification (client/service loaded).
+    Kept short and self-contained so it stays readable after the booking is deleted.
+    """
+    dt_str = booking.start_time.strftime("%Y-%m-%d %H:%M")
+    client = booking.client
+    return (
+        f"Booking #{booking.id} {kind.lower()}: {booking.service.name} at {dt_str} "
+        f"for {client.name} <{client.email}>"
+    )
+
+
+@shared_task
+def send_booking_confirmation(booking_id: int):
+    """
+    Send the confirmation email for a booking and record it as a Notification.
+    """
+    booking = (
+        Booking.objects.select_related("client", "service")
+        .filter(pk=booking_id)
+        .first()
+    )
+    if booking is None:
+        return  # deleted before the worker picked it up
+
+    client = booking.client
+
+    # Record what was sent for auditing (a summary; the body is rebuilt on demand)
+    Notification.objects.create(
+        user=client, booking=booking, kind="CONFIRMED", sent=True,
+        message=notification_summary(booking, "CONFIRMED"),
+    )
+
+    # Send the email to the client
+    send_email("Booking Confirmation", confirmation_body(booking), client.email)
+
+
+@shared_task
+def send_booking_cancellation(booking_id: int):
+    """
+    Send the cancellation email for a booking, record it as a Notification, and
+    alert the owner (only if EMAIL_HOST_USER is configured).
+    """
+    booking = (
+        Booking.objects.select_related("client", "service")
+        .filter(pk=booking_id)
+        .first()
+    )
+    if booking is None:
+        return  # deleted before the worker picked it up
+
+    client = booking.client
+    dt_str = booking.start_time.strftime("%A, %B %d, %Y at %I:%M %p")
+    cancelled_at = booking.cancellation_time or timezone.now()
+    now_str = cancelled_at.strftime("%Y-%m-%d %H:%M:%S")
+
+    body_client = cancellation_body(booking)
+
+    # Record notification (the owner alert isn't tied to a client, so no row for it)
+    Notification.objects.create(
+        user=client, booking=booking, kind="CANCELLED", sent=True,
+        message=notification_summary(booking, "CANCELLED"),
+    )
+    messages = [(f"Booking #{booking.id} Cancelled", body_client, client.email)]
+
+    # Optional owner/admin alert: only if EMAIL_HOST_USER is configured
+    owner_email = getattr(settings, "EMAIL_HOST_USER", None)
+    if owner_email:
+        body_owner = (
+            f"ALERT: Booking #{booking.id} cancelled.\n"
+            f"Client: {client.name} ({client.email})\n"
+            f"Service: {booking.service.name}\n"
+            f"Original Time: {dt_str}\n"
+            f"Cancellation Time: {now_str}\n"
+        )
+        messages.append((f"ALERT: Booking #{booking.id} CANCELLED", body_owner, owner_email))
+
+    # Client email + owner alert share one SMTP connection
+    send_emails(messages)
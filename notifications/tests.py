@@ -1,7 +1,12 @@
-from django.test import TestCase
+from decimal import Decimal
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
 from django.core import mail
 from django.contrib.auth.models import User
-from booking.models import Booking
+from django.utils import timezone
+from booking.models import Booking, ClientProfile, Service
+from notifications.models import Notification
 
 class NotificationTests(TestCase):
 
@@ -23,3 +28,87 @@ class NotificationTests(TestCase):
         # Email should have been sent
         self.assertEqual(len(mail.outbox), 1)
         self.assertIn("confirmed", mail.outbox[0].body)
+
+
+class BookingEmailTaskTests(TestCase):
+    def setUp(self):
+        self.client_profile = ClientProfile.objects.create(
+            name="Client One", email="client1@example.com", phone="5551234"
+        )
+        self.service = Service.objects.create(
+            name="Cut", duration_minutes=60, price=Decimal("50.00")
+        )
+
+    def test_confirmation_email_queued_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Booking.objects.create(
+                client=self.client_profile,
+                service=self.service,
+                start_time=timezone.now() + timedelta(days=1),
+            )
+        # Nothing is sent until the transaction commits
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+
+        # Tasks run inline without a broker (CELERY_TASK_ALWAYS_EAGER)
+        callbacks[0]()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("confirmed", mail.outbox[0].body)
+        notification = Notification.objects.get(user=self.client_profile)
+        self.assertEqual(notification.kind, "CONFIRMED")
+        self.assertIn("Cut", notification.message)  # summary only; the body is rebuilt
+        self.assertIn("client1@example.com", notification.message)
+        self.assertEqual(notification.display_message, mail.outbox[0].body)
+
+        # The summary outlives the booking (FK is SET_NULL)
+        summary = notification.message
+        Booking.objects.all().delete()
+        notification.refresh_from_db()
+        self.assertIsNone(notification.booking)
+        self.assertEqual(notification.display_message, summary)
+
+    def test_cancellation_email_queued_after_commit(self):
+        booking = Booking.objects.create(
+            client=self.client_profile,
+            service=self.service,
+            start_time=timezone.now() + timedelta(days=1),
+        )
+        mail.outbox.clear()
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            booking.status = "CANCELLED"
+            booking.save(update_fields=["status"])
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(len(callbacks), 1)
+
+        callbacks[0]()
+        self.assertEqual(mail.outbox[0].subject, f"Booking #{booking.id} Cancelled")
+        self.assertIn("has been cancelled", mail.outbox[0].body)
+        self.assertEqual(Notification.objects.filter(user=self.client_profile).count(), 1)
+
+    @override_settings(EMAIL_HOST_USER="owner@example.com")
+    def test_cancellation_sends_owner_alert(self):
+        booking = Booking.objects.create(
+            client=self.client_profile,
+            service=self.service,
+            start_time=timezone.now() + timedelta(days=1),
+        )
+        mail.outbox.clear()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            booking.status = "CANCELLED"
+            booking.save(update_fields=["status"])
+        self.assertEqual(
+            [m.to for m in mail.outbox], [["client1@example.com"], ["owner@example.com"]]
+        )
+
+    def test_resave_without_status_change_sends_nothing(self):
+        booking = Booking.objects.create(
+            client=self.client_profile,
+            service=self.service,
+            start_time=timezone.now() + timedelta(days=1),
+        )
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            booking.notes = "Bring reference photo"
+            booking.save()
+        self.assertEqual(callbacks, [])
@@ -1,3 +1,94 @@
+from decimal import Decimal
+from datetime import date, datetime, time, timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from booking.models import Booking, ClientProfile, Service
+from reports.renderers import ORJSONRenderer
+
+
+class ReportsSummaryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.api = APIClient()
+        User.objects.create_user(username="staff1", password="Password123!", is_staff=True)
+        self.api.login(username="staff1", password="Password123!")
+
+        self.cut = Service.objects.create(name="Cut", duration_minutes=60, price=Decimal("50.00"))
+        self.color = Service.objects.create(name="Color", duration_minutes=90, price=Decimal("80.00"))
+        client = ClientProfile.objects.create(name="Client One", email="client1@example.com", phone="5551234")
+
+        # Late evening local time: still "yesterday" locally even where UTC has rolled over
+        self.day = timezone.localdate() - timedelta(days=1)
+        start = timezone.make_aware(datetime.combine(self.day, time(22, 30)))
+        Booking.objects.create(client=client, service=self.cut, start_time=start)
+        Booking.objects.create(client=client, service=self.cut, start_time=start - timedelta(hours=2))
+        Booking.objects.create(
+            client=client, service=self.color, start_time=start - timedelta(hours=4), status="CANCELLED"
+        )
+
+    def test_summary(self):
+        r = self.api.get("/api/reports/summary")
+        self.assertEqual(r.status_code, 200, r.content)
+        data = r.json()
+        self.assertEqual(data["bookings_per_day"], [{"day": self.day.isoformat(), "count": 3}])
+        self.assertEqual(data["cancellations_per_day"], [{"day": self.day.isoformat(), "count": 1}])
+
+        start_day = date.fromisoformat(data["start_day"])
+        self.assertEqual(start_day, timezone.localdate() - timedelta(days=30))
+        offset = (self.day - start_day).days
+        self.assertEqual(len(data["counts"]), 31)
+        self.assertEqual(data["counts"][offset], 3)
+        self.assertEqual(sum(data["counts"]), 3)
+        self.assertEqual(data["cancellations"][offset], 1)
+        self.assertEqual(sum(data["cancellations"]), 1)
+
+        self.assertEqual(
+            data["top_services"],
+            [
+                {"service_id": self.cut.id, "service_name": "Cut", "count": 2},
+                {"service_id": self.color.id, "service_name": "Color", "count": 1},
+            ],
+        )
+
+    def test_dense_arrays_stop_at_today(self):
+        client = ClientProfile.objects.get()
+        Booking.objects.create(client=client, service=self.cut, start_time=timezone.now() + timedelta(days=365))
+        data = self.api.get("/api/reports/summary").json()
+        self.assertEqual(len(data["counts"]), 31)
+        self.assertEqual(len(data["cancellations"]), 31)
+        self.assertEqual(sum(data["counts"]), 3)
+
+    def test_window_starts_at_local_midnight(self):
+        start_day = timezone.localdate() - timedelta(days=30)
+        client = ClientProfile.objects.get()
+        Booking.objects.create(
+            client=client, service=self.cut,
+            start_time=timezone.make_aware(datetime.combine(start_day, time(0, 5))),
+        )
+        Booking.objects.create(
+            client=client, service=self.cut,
+            start_time=timezone.make_aware(datetime.combine(start_day - timedelta(days=1), time(23, 55))),
+        )
+        data = self.api.get("/api/reports/summary").json()
+        self.assertEqual(data["start_day"], start_day.isoformat())
+        self.assertEqual(data["bookings_per_day"][0], {"day": start_day.isoformat(), "count": 1})
+        self.assertEqual(data["counts"][0], 1)
+
+    def test_summary_rendered_by_orjson(self):
+        r = self.api.get("/api/reports/summary")
+        self.assertEqual(r["Content-Type"], "application/json")
+        self.assertIsInstance(r.accepted_renderer, ORJSONRenderer)
+
+    def test_requires_staff(self):
+        self.assertEqual(APIClient().get("/api/reports/summary").status_code, 403)
 
-# Create your tests here.
+    def test_summary_is_cached(self):
+        first = self.api.get("/api/reports/summary").json()
+        with self.assertNumQueries(2):  # session + user for the staff check only
+            r = self.api.get("/api/reports/summary")
+        self.assertEqual(r.json(), first)
@@ -1,20 +1,24 @@
 # reports/views.py
 
-from django.db.models import Count
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import BasePermission
+from rest_framework.permissions import IsAdminUser
 
-from booking.models import Booking, Service
+from booking.models import Booking
+from .renderers import REPORT_RENDERERS
 
+# Older schemas had no Booking.status; checked once at import, not per request.
+HAS_STATUS = any(f.name == "status" for f in Booking._meta.get_fields())
 
-class IsStaffOnly(BasePermission):
-    """
-    Only allow requests from logged-in staff users.
-    """
-    def has_permission(self, request, view):
-        return bool(request.user and request.user.is_staff)
+# The summary is the same for every staff viewer and its 30-day window only moves
+# at midnight, so it is computed at most once per TTL (new bookings show up after it).
+SUMMARY_TTL = 60  # seconds
 
 
 class ReportsView(APIView):
@@ -25,62 +29,89 @@ class ReportsView(APIView):
     - bookings_per_day: [{ "day": "YYYY-MM-DD", "count": N }, ...]
     - cancellations_per_day: [{ "day": "YYYY-MM-DD", "count": N }, ...]
     - top_services: [{ "service_id": X, "service_name": "...", "count": N }, ...]
+    - start_day: "YYYY-MM-DD", with counts / cancellations: [N, ...] holding the
+      per-day totals above densely (index i = start_day + i days, zero-filled,
+      31 entries ending today)
 
-    Only accessible by staff users.
+    Only accessible by staff users. Cached for SUMMARY_TTL seconds per local day.
     """
-    permission_classes = [IsStaffOnly]
+    permission_classes = [IsAdminUser]  # logged-in staff only
+    renderer_classes = REPORT_RENDERERS
 
     def get(self, request):
-        # Look back 30 days from now
+        # Permission checks run before get(), so the cache is never served to non-staff
+        key = f"reports:summary:{timezone.localdate().isoformat()}"
+        data = cache.get(key)
+        if data is None:
+            data = self._summary()
+            cache.set(key, data, timeout=SUMMARY_TTL)
+        return Response(data)
+
+    def _summary(self) -> dict:
+        # Look back 30 whole local days: starting at midnight keeps the window (and
+        # its SQL) identical for every request in a day, matching the per-day cache key.
         now = timezone.now()
-        start = now - timezone.timedelta(days=30)
+        today = timezone.localdate(now)
+        start = timezone.make_aware(datetime.combine(today - timedelta(days=30), time.min))
 
-        # Bookings per day (last 30 days)
-        # .extra(select={'day': "date(start_time)"}) is a simple way to group by date(start_time).
-        # This is OK for a student project; more advanced: annotate with TruncDate (PostgreSQL).
-        bookings_qs = (
+        # Bookings and cancellations per day (last 30 days), in one GROUP BY:
+        # Count(filter=...) counts cancellations alongside the total.
+        # TruncDate groups by the local calendar day (settings TIME_ZONE) in
+        # portable SQL, unlike the SQLite-only .extra("date(start_time)") it replaces.
+        # COUNT(*) counts rows without reading id, so the start_time index can cover it.
+        counts = {"total": Count('*')}
+        if HAS_STATUS:
+            counts["cancelled"] = Count('id', filter=Q(status="CANCELLED"))
+        per_day = (
             Booking.objects.filter(start_time__gte=start)
-            .extra(select={'day': "date(start_time)"})
+            .annotate(day=TruncDate('start_time'))
             .values('day')
-            .annotate(count=Count('id'))
+            .annotate(**counts)
             .order_by('day')
         )
+        bookings_per_day = []
+        cancellations_per_day = []
+        for row in per_day:
+            bookings_per_day.append({"day": row["day"], "count": row["total"]})
+            if row.get("cancelled"):
+                cancellations_per_day.append({"day": row["day"], "count": row["cancelled"]})
 
-        # Cancellations per day (last 30 days)
-        field_names = [f.name for f in Booking._meta.get_fields()]
-        if "status" in field_names:
-            cancellations_qs = (
-                Booking.objects.filter(status="CANCELLED", start_time__gte=start)
-                .extra(select={'day': "date(start_time)"})
-                .values('day')
-                .annotate(count=Count('id'))
-                .order_by('day')
-            )
-        else:
-            cancellations_qs = []
+        # Same counts as dense arrays indexed by days since start_day (zero-filled),
+        # so clients can look a day up by offset. Fixed at the 31 days up to and
+        # including today: future bookings stay in the lists above only, so one
+        # far-off (or mistyped) date can't stretch every response.
+        start_day = start.date()
+        day_counts = [0] * ((today - start_day).days + 1)
+        day_cancellations = [0] * len(day_counts)
+        for row in bookings_per_day:
+            if row["day"] <= today:
+                day_counts[(row["day"] - start_day).days] = row["count"]
+        for row in cancellations_per_day:
+            if row["day"] <= today:
+                day_cancellations[(row["day"] - start_day).days] = row["count"]
 
-        # Top services by bookings (last 30 days), top 5
+        # Top services by bookings (last 30 days), top 5.
+        # service__name joins Service in the same query: no separate name lookup.
         top_services = (
             Booking.objects.filter(start_time__gte=start)
-            .values('service')
-            .annotate(count=Count('id'))
+            .values('service_id', 'service__name')
+            .annotate(count=Count('*'))
             .order_by('-count')[:5]
         )
-
-        # Map service IDs to service names for readability
-        service_names = {s.id: s.name for s in Service.objects.all()}
         top_services_named = [
             {
-                "service_id": row["service"],
-                "service_name": service_names.get(row["service"]),
+                "service_id": row["service_id"],
+                "service_name": row["service__name"],
                 "count": row["count"],
             }
             for row in top_services
         ]
 
-        data = {
-            "bookings_per_day": list(bookings_qs),
-            "cancellations_per_day": list(cancellations_qs),
+        return {
+            "bookings_per_day": bookings_per_day,
+            "cancellations_per_day": cancellations_per_day,
             "top_services": top_services_named,
+            "start_day": start_day,
+            "counts": day_counts,
+            "cancellations": day_cancellations,
         }
-        return Response(data)
\ No newline at end of file
@@ -6,4 +6,6 @@ from .models import StaffAvailability  # Only availability is managed here
 class StaffAvailabilityAdmin(admin.ModelAdmin):
     list_display = ("staff", "start_time", "end_time")
     list_filter = ("staff",)
-    search_fields = ("staff__name",)
\ No newline at end of file
+    search_fields = ("staff__name",)
+    list_select_related = ("staff",)
+    raw_id_fields = ("staff",)  # id + lookup popup instead of a <select> of every staff row
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-15 22:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking', '0014_booking_active_start_idx'),
+        ('staff', '0002_alter_staffavailability_staff_delete_staff'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='staffavailability',
+            index=models.Index(fields=['staff', 'start_time'], name='staffavail_staff_start_idx'),
+        ),
+    ]
@@ -16,6 +16,12 @@ class StaffAvailability(models.Model):
 
     class Meta:
         ordering = ["staff_id", "start_time"]
+        indexes = [
+            # Matches the default ordering and per-staff window lookups
+            # (AvailabilityEngine._fits_staff_availability); also covers the
+            # engine's "which staff have any windows" DISTINCT staff_id scan.
+            models.Index(fields=["staff", "start_time"], name="staffavail_staff_start_idx"),
+        ]
 
     def __str__(self):
         return f"{self.staff.name}: {self.start_time} - {self.end_time}"
\ No newline at end of file
@@ -1,3 +1,49 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from booking.models import Staff
+from staff.models import StaffAvailability
+from staff.views import StaffAvailabilityViewSet
+
+
+class StaffAvailabilityListTests(TestCase):
+    # Drives the viewset directly: under /api/staff/ the booking router's
+    # staff-detail route matches "availability/" first.
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.user = User.objects.create_user(username="staff1", password="Password123!", is_staff=True)
+        self.list_view = StaffAvailabilityViewSet.as_view({"get": "list"})
+
+        start = timezone.now() + timedelta(days=1)
+        for i in range(3):
+            staff = Staff.objects.create(name=f"Stylist {i}", email=f"stylist{i}@example.com", role="Stylist")
+            StaffAvailability.objects.create(staff=staff, start_time=start, end_time=start + timedelta(hours=8))
+
+    def get_list(self, user=None, **params):
+        request = self.factory.get("/api/staff/availability/", params)
+        force_authenticate(request, user=user or self.user)
+        response = self.list_view(request)
+        response.render()
+        return response
+
+    def test_list_query_count_is_flat(self):
+        # page count + one page; the serializer emits staff_id only, so no per-window staff lookups
+        with self.assertNumQueries(2):
+            r = self.get_list()
+        self.assertEqual(r.status_code, 200, r.content)
+        self.assertEqual(len(r.data["results"]), 3)
+
+    def test_list_is_paginated(self):
+        r = self.get_list(page_size=2)
+        self.assertEqual(r.data["count"], 3)
+        self.assertEqual(len(r.data["results"]), 2)
+        self.assertIsNotNone(r.data["next"])
 
-# Create your tests here.
+    def test_requires_staff(self):
+        client_user = User.objects.create_user(username="client1", password="Password123!")
+        r = self.get_list(user=client_user)
+        self.assertEqual(r.status_code, 403)
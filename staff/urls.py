@@ -1,8 +1,8 @@
 from django.urls import path, include
-from rest_framework.routers import DefaultRouter
+from rest_framework.routers import SimpleRouter
 from .views import StaffAvailabilityViewSet
 
-router = DefaultRouter()
+router = SimpleRouter()
 router.register(r"availability", StaffAvailabilityViewSet, basename="staff-availability")
 
 urlpatterns = [path("", include(router.urls))]
\ No newline at end of file
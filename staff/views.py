@@ -1,13 +1,19 @@
 from rest_framework import viewsets
-from rest_framework.permissions import BasePermission
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.permissions import IsAdminUser
 from .models import StaffAvailability
 from .serializers import StaffAvailabilitySerializer
 
-class IsStaffOnly(BasePermission):
-    def has_permission(self, request, view):
-        return bool(request.user and request.user.is_staff)
+class StaffAvailabilityPagination(PageNumberPagination):
+    # Page numbers rather than a cursor: the list is ordered by staff first, and
+    # a cursor only keys on the first ordering field.
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
 
 class StaffAvailabilityViewSet(viewsets.ModelViewSet):
-    queryset = StaffAvailability.objects.all().order_by("staff_id", "start_time")
+    # id breaks ties so pages never overlap
+    queryset = StaffAvailability.objects.order_by("staff_id", "start_time", "id")
     serializer_class = StaffAvailabilitySerializer
-    permission_classes = [IsStaffOnly]
\ No newline at end of file
+    permission_classes = [IsAdminUser]  # logged-in staff only
+    pagination_class = StaffAvailabilityPagination
\ No newline at end of file